@@ -1,5 +1,7 @@
 import os
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timezone
 from types import SimpleNamespace
 from uuid import uuid4
 
@@ -53,6 +55,20 @@ def get_connection():
     return _POOL.get_connection()
 
 
+def _utc_now_str() -> str:
+    """
+    Current UTC time formatted for DATETIME columns ("YYYY-MM-DD HH:MM:SS").
+
+    datetime.utcnow() is deprecated; this derives the same naive-UTC value
+    from the aware clock.
+    """
+    return (
+        datetime.now(timezone.utc)
+        .replace(tzinfo=None)
+        .isoformat(sep=" ", timespec="seconds")
+    )
+
+
 # ---------------------------------------------------------------------------
 # Schema definitions for MySQL (chloe_home_test)
 # ---------------------------------------------------------------------------
@@ -112,7 +128,7 @@ SCHEMA_STATEMENTS: dict[str, str] = {
         CREATE TABLE IF NOT EXISTS password_reset_tokens (
             token      VARCHAR(64) NOT NULL PRIMARY KEY,
             user_id    CHAR(36),
-            expires_at DATETIME
+            expires_at BIGINT
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
     """,
     "orders": """
@@ -234,6 +250,10 @@ class _CursorWrapper:
         data = {cols[i]: row[i] for i in range(len(cols))}
         return SimpleNamespace(**data)
 
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
     def fetchall(self):
         rows = self._cursor.fetchall()
         if not rows:
@@ -246,6 +266,50 @@ class _CursorWrapper:
         return out
 
 
+# ---------------------------------------------------------------------------
+# In-process TTL cache for single-item reads
+# ---------------------------------------------------------------------------
+# Inventory rows change rarely compared to how often they are read (cart
+# renders, availability checks), so get_item_by_id keeps recently fetched
+# rows for a short window. Entries are stored as plain dicts and handed
+# back as fresh SimpleNamespace objects so callers can't mutate the cached
+# copy. Every inventory write below drops the affected ids.
+_ITEM_CACHE_TTL_SECONDS = 60
+_ITEM_CACHE_MAX_ENTRIES = 10_000
+
+_item_cache: dict = {}  # (tablename, item_id) -> (expires_at, row_dict)
+_item_cache_lock = threading.RLock()
+
+
+def _cached_item_get(tablename: str, item_id: str):
+    key = (tablename, str(item_id))
+    with _item_cache_lock:
+        entry = _item_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, data = entry
+        if expires_at < time.monotonic():
+            _item_cache.pop(key, None)
+            return None
+        return SimpleNamespace(**data)
+
+
+def _cached_item_put(tablename: str, item_id: str, row):
+    with _item_cache_lock:
+        if len(_item_cache) >= _ITEM_CACHE_MAX_ENTRIES:
+            _item_cache.clear()
+        _item_cache[(tablename, str(item_id))] = (
+            time.monotonic() + _ITEM_CACHE_TTL_SECONDS,
+            vars(row).copy(),
+        )
+
+
+def _invalidate_cached_items(item_ids, tablename: str = "inventory"):
+    with _item_cache_lock:
+        for item_id in item_ids:
+            _item_cache.pop((tablename, str(item_id)), None)
+
+
 class DBInterface:
     """
     MySQL-backed implementation of the application's database interface.
@@ -259,6 +323,10 @@ class DBInterface:
         # New connection per instance; each Flask request generally creates
         # its own DBInterface and calls shutdown() in a finally block.
         self.conn = get_connection()
+        # Statements issued through this instance. Since an instance lives
+        # for one request, this doubles as a per-request query count that
+        # the app can inspect at teardown to spot N+1 regressions.
+        self.query_count = 0
 
     # ------------------------------------------------------------------
     # Internal helpers
@@ -271,6 +339,7 @@ class DBInterface:
         """
         # Use a buffered cursor so results are fully fetched and we don't
         # hit "Unread result found" errors when committing.
+        self.query_count += 1
         cur = self.conn.cursor(buffered=True)
         cur.execute(query, params)
 
@@ -345,16 +414,15 @@ class DBInterface:
         sale_id = str(uuid4())
         payment_id = str(uuid4())
 
+        # price is DECIMAL(10, 2) in the schema; rows carry numeric values
+        # (or NULL), so no per-row parse-and-catch is needed.
         subtotal = 0.0
         for it in items:
-            try:
-                subtotal += float(getattr(it, "price", 0) or 0)
-            except Exception:
-                continue
+            subtotal += float(getattr(it, "price", 0) or 0)
 
         taxes = round(subtotal * self.TAX_RATE, 2)
         total = round(subtotal + taxes + float(shipping_fee or 0), 2)
-        now = datetime.utcnow().isoformat(sep=" ", timespec="seconds")
+        now = _utc_now_str()
 
         # Insert order (formerly 'sale')
         self._execute(
@@ -430,6 +498,30 @@ class DBInterface:
         cur = self._execute(query, (user_id, limit, offset))
         return cur.fetchall()
 
+    def get_sales_page_for_user(self, user_id: str, limit: int, offset: int = 0):
+        """
+        Return (rows, total) for a page of a user's sales in one query:
+        COUNT(*) OVER () carries the full match count alongside each row,
+        so pagination needs no separate COUNT round-trip. An empty page
+        (offset past the end) reports total 0; callers that care must
+        fall back to count_sales_for_user.
+        """
+        if not user_id or limit <= 0:
+            return [], 0
+        if offset < 0:
+            offset = 0
+        query = """
+            SELECT order_id AS sale_id, date, total,
+                   COUNT(*) OVER () AS total_rows
+            FROM orders
+            WHERE user_id = %s
+            ORDER BY date DESC
+            LIMIT %s OFFSET %s;
+        """
+        rows = self._execute(query, (user_id, limit, offset)).fetchall()
+        total = int(getattr(rows[0], "total_rows", 0) or 0) if rows else 0
+        return rows, total
+
     def get_sale_by_id(self, sale_id: str):
         """
         Fetch a single sale row by its primary key sale_id.
@@ -463,12 +555,18 @@ class DBInterface:
     # Password reset token helpers
     # ------------------------------------------------------------------
 
-    def create_password_reset_token(self, user_id: str, token: str, expires_at: str):
+    def create_password_reset_token(self, user_id: str, token: str, expires_at: int):
         """
-        Store a password reset token for a user. Any existing token with the same
-        value will be overwritten.
+        Store a password reset token for a user, with expiry as epoch
+        seconds. Any existing token with the same value will be overwritten.
+        Expired tokens are swept opportunistically on each insert so the
+        table never accumulates stale rows.
         """
         self._ensure_password_reset_table()
+        self._execute(
+            "DELETE FROM password_reset_tokens WHERE expires_at < %s;",
+            (int(time.time()),),
+        )
         query = """
             INSERT INTO password_reset_tokens (token, user_id, expires_at)
             VALUES (%s, %s, %s)
@@ -503,9 +601,7 @@ class DBInterface:
         Insert a new inventory row; returns the generated id.
         """
         item_id = str(uuid4())
-        created_at = data.get("created_at") or datetime.utcnow().isoformat(
-            sep=" ", timespec="seconds"
-        )
+        created_at = data.get("created_at") or _utc_now_str()
         updated_at = data.get("updated_at") or created_at
         # Derive a category if not explicitly provided
         category = data.get("category") or self._infer_inventory_category(
@@ -551,13 +647,97 @@ class DBInterface:
         cur = self._execute(query)
         return cur.fetchall()
 
+    def get_top_picks(self, limit: int = 10):
+        """
+        Return up to `limit` available, non-discounted items with the
+        lowest view counts (surfacing under-discovered pieces), selected
+        entirely in SQL instead of filtering the whole table in Python.
+        """
+        cur = self._execute(
+            """
+            SELECT * FROM inventory
+            WHERE LOWER(COALESCE(status, '')) = 'available'
+              AND (original_price IS NULL OR original_price <= price)
+            ORDER BY COALESCE(views, 0) ASC
+            LIMIT %s;
+            """,
+            (limit,),
+        )
+        return cur.fetchall()
+
+    def get_category_spotlights(self, limit: int = 4):
+        """
+        Return up to `limit` {"category", "item"} dicts: the most-populated
+        concrete categories, each with one representative item (preferring
+        one that has an image). A single window-function query replaces the
+        group-and-scan the home page used to do over the full table.
+        """
+        cur = self._execute(
+            """
+            WITH ranked AS (
+                SELECT i.*,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY category
+                           ORDER BY (image_url IS NOT NULL AND image_url <> '') DESC,
+                                    created_at ASC
+                       ) AS rn,
+                       COUNT(*) OVER (PARTITION BY category) AS cat_count
+                FROM inventory i
+                WHERE category IS NOT NULL
+                  AND category <> ''
+                  AND category <> 'Other'
+            )
+            SELECT * FROM ranked
+            WHERE rn = 1
+            ORDER BY cat_count DESC
+            LIMIT %s;
+            """,
+            (limit,),
+        )
+        spotlights = []
+        for row in cur.fetchall():
+            data = vars(row).copy()
+            data.pop("rn", None)
+            data.pop("cat_count", None)
+            spotlights.append(
+                {
+                    "category": data.get("category"),
+                    "item": SimpleNamespace(**data),
+                }
+            )
+        return spotlights
+
+    def get_related_items(self, category: str, exclude_id: str, limit: int = 10):
+        """
+        Return up to `limit` other items in the same category, selected in
+        SQL rather than scanning the whole table client-side.
+        """
+        if not category:
+            return []
+        cur = self._execute(
+            """
+            SELECT * FROM inventory
+            WHERE category = %s AND id <> %s
+            LIMIT %s;
+            """,
+            (category, str(exclude_id), limit),
+        )
+        return cur.fetchall()
+
     def get_item_by_id(self, tablename, item_id: str):
         """
-        Fetch a single item by its UUID primary key.
+        Fetch a single item by its UUID primary key, serving repeat reads
+        from the short-TTL in-process cache above.
         """
+        cached = _cached_item_get(tablename, item_id)
+        if cached is not None:
+            return cached
         query = f"SELECT * FROM {tablename} WHERE id = %s;"
         cur = self._execute(query, (item_id,))
-        return cur.fetchone()
+        row = cur.fetchone()
+        if row is not None:
+            _cached_item_put(tablename, item_id, row)
+        return row
 
     def increment_item_view_count(self, tablename: str, item_id: str):
         """
@@ -571,6 +751,30 @@ class DBInterface:
             WHERE id = %s;
         """
         self._execute(query, (item_id,))
+        _invalidate_cached_items([item_id], tablename)
+
+    def increment_and_return_views(self, item_id: str) -> int:
+        """
+        Bump an inventory item's view counter and hand back the new value
+        without re-reading the row, via MySQL's LAST_INSERT_ID(expr) trick
+        (the session-scoped value survives to the follow-up SELECT).
+        """
+        if not item_id:
+            return 0
+        cur = self._execute(
+            """
+            UPDATE inventory
+            SET views = LAST_INSERT_ID(COALESCE(views, 0) + 1)
+            WHERE id = %s;
+            """,
+            (item_id,),
+        )
+        _invalidate_cached_items([item_id])
+        if cur.rowcount == 0:
+            return 0
+        cur = self._execute("SELECT LAST_INSERT_ID() AS views;")
+        row = cur.fetchone()
+        return int(getattr(row, "views", 0) or 0)
 
     def increment_item_like_count(self, tablename: str, item_id: str):
         """
@@ -584,6 +788,7 @@ class DBInterface:
             WHERE id = %s;
         """
         self._execute(query, (item_id,))
+        _invalidate_cached_items([item_id], tablename)
 
     # ------------------------------------------------------------------
     # Per-user like helpers
@@ -629,6 +834,7 @@ class DBInterface:
             """,
             (item_id,),
         )
+        _invalidate_cached_items([item_id], tablename)
 
     def remove_like_for_item(
         self, user_id: str, item_id: str, tablename: str = "inventory"
@@ -657,6 +863,7 @@ class DBInterface:
             """,
             (item_id,),
         )
+        _invalidate_cached_items([item_id], tablename)
 
     # ------------------------------------------------------------------
     # User helpers
@@ -856,7 +1063,7 @@ class DBInterface:
         """
         Update an existing item in the given table.
         """
-        updated_at = datetime.utcnow().isoformat(sep=" ", timespec="seconds")
+        updated_at = _utc_now_str()
         # Preserve existing category unless explicitly provided; if not present,
         # recompute based on the updated name/description.
         existing = self.get_item_by_id(tablename, item_id)
@@ -906,66 +1113,55 @@ class DBInterface:
                 item_id,
             ),
         )
+        _invalidate_cached_items([item_id], tablename)
 
-    def mark_items_pending(self, tablename, item_ids):
+    def _set_items_status(self, tablename, item_ids, status: str):
         """
-        Mark the given items as pending (reserved/in cart or awaiting pickup)
-        without changing other fields.
+        Set the status for all given items in a single UPDATE using an IN
+        clause, rather than issuing one round trip per item.
         """
         if not item_ids:
             return
-        now = datetime.utcnow().isoformat(sep=" ", timespec="seconds")
+        now = _utc_now_str()
+        placeholders = ", ".join(["%s"] * len(item_ids))
         query = f"""
             UPDATE {tablename}
             SET status = %s,
                 updated_at = %s
-            WHERE id = %s;
+            WHERE id IN ({placeholders});
         """
-        for item_id in item_ids:
-            self._execute(
-                query,
-                ("pending", now, item_id),
-            )
+        self._execute(query, tuple([status, now, *item_ids]))
+        _invalidate_cached_items(item_ids, tablename)
+
+    def mark_items_pending(self, tablename, item_ids):
+        """
+        Mark the given items as pending (reserved/in cart or awaiting pickup)
+        without changing other fields.
+        """
+        self._set_items_status(tablename, item_ids, "pending")
 
     def mark_items_sold(self, tablename, item_ids):
         """
         Mark the given items as sold (payment completed) without changing
         other fields.
         """
-        if not item_ids:
-            return
-        now = datetime.utcnow().isoformat(sep=" ", timespec="seconds")
-        query = f"""
-            UPDATE {tablename}
-            SET status = %s,
-                updated_at = %s
-            WHERE id = %s;
-        """
-        for item_id in item_ids:
-            self._execute(
-                query,
-                ("sold", now, item_id),
-            )
+        self._set_items_status(tablename, item_ids, "sold")
 
     def mark_items_available(self, tablename, item_ids):
         """
         Mark the given items as available again (e.g., removed from all carts)
         without changing other fields.
         """
-        if not item_ids:
-            return
-        now = datetime.utcnow().isoformat(sep=" ", timespec="seconds")
-        query = f"""
-            UPDATE {tablename}
-            SET status = %s,
-                updated_at = %s
-            WHERE id = %s;
+        self._set_items_status(tablename, item_ids, "available")
+
+    def finalize_order(self, cart_id: str, item_ids, tablename: str = "inventory"):
         """
-        for item_id in item_ids:
-            self._execute(
-                query,
-                ("available", now, item_id),
-            )
+        After a successful payment capture, mark the purchased items as sold
+        and empty the cart in one batched interaction on this connection:
+        a single multi-row UPDATE followed by the cart delete.
+        """
+        self._set_items_status(tablename, list(item_ids), "sold")
+        self.clear_cart(cart_id)
 
     def delete_inventory_item(self, item_id: str):
         """
@@ -1006,6 +1202,7 @@ class DBInterface:
             "DELETE FROM inventory WHERE id = %s;",
             (item_id,),
         )
+        _invalidate_cached_items([item_id])
 
     def get_images_for_item(self, item_id: str):
         """
@@ -1061,36 +1258,102 @@ class DBInterface:
                 result.setdefault(key, []).append(row.image_url)
         return result
 
+    def get_item_with_images(self, item_id: str):
+        """
+        Load one inventory item together with its gallery images in a single
+        LEFT JOIN, instead of one query for the row and another for the
+        images. Returns (item, images); item is None when the id is unknown.
+        """
+        self._ensure_images_table()
+        cur = self._execute(
+            """
+            SELECT i.*, img.image_url AS gallery_image_url
+            FROM inventory i
+            LEFT JOIN inventory_images img ON img.item_id = i.id
+            WHERE i.id = %s;
+            """,
+            (item_id,),
+        )
+        rows = cur.fetchall()
+        if not rows:
+            return None, []
+        item_data = vars(rows[0]).copy()
+        item_data.pop("gallery_image_url", None)
+        item = SimpleNamespace(**item_data)
+        images = [
+            row.gallery_image_url
+            for row in rows
+            if getattr(row, "gallery_image_url", None)
+        ]
+        return item, images
+
     # -----------------------
     # Cart helper operations
     # -----------------------
 
+    # Hot-path cart statements as class constants: no per-call string
+    # assembly, and the byte-identical text keeps statement digests
+    # stable for server-side monitoring (performance_schema groups by
+    # digest).
+    _SQL_CART_ITEMS = "SELECT item_id, quantity FROM cart_items WHERE cart_id = %s;"
+    _SQL_CART_ITEM_IDS = "SELECT item_id FROM cart_items WHERE cart_id = %s;"
+    _SQL_IS_ITEM_IN_CART = (
+        "SELECT quantity FROM cart_items WHERE cart_id = %s AND item_id = %s LIMIT 1;"
+    )
+    _SQL_ITEM_IN_ANY_CART = "SELECT cart_id FROM cart_items WHERE item_id = %s LIMIT 1;"
+    _SQL_CART_ITEMS_WITH_INVENTORY = (
+        "SELECT c.quantity, i.* FROM cart_items c "
+        "JOIN inventory i ON i.id = c.item_id "
+        "WHERE c.cart_id = %s;"
+    )
+
+    def get_cart_items_with_inventory(self, cart_id: str):
+        """
+        Return a cart's inventory rows joined with their quantities in one
+        statement: each row is the full inventory row plus a `quantity`
+        attribute. Cart rows whose item no longer exists drop out of the
+        join. Saves the cart-rows/items-by-id round-trip pair.
+        """
+        self._ensure_cart_items_table()
+        cur = self._execute(self._SQL_CART_ITEMS_WITH_INVENTORY, (cart_id,))
+        return cur.fetchall()
+
     def get_cart_items(self, cart_id: str):
         """
         Return all (item_id, quantity) rows for a given cart.
         """
         self._ensure_cart_items_table()
-        cur = self._execute(
-            "SELECT item_id, quantity FROM cart_items WHERE cart_id = %s;",
-            (cart_id,),
-        )
+        cur = self._execute(self._SQL_CART_ITEMS, (cart_id,))
         return cur.fetchall()
 
+    def get_cart_item_ids(self, cart_id: str) -> set:
+        """
+        Return just the set of item_ids in a cart. Cheaper than
+        get_cart_items when the caller only needs membership checks.
+        """
+        self._ensure_cart_items_table()
+        cur = self._execute(self._SQL_CART_ITEM_IDS, (cart_id,))
+        return {str(row.item_id) for row in cur.fetchall()}
+
     def get_cart_item_count(self, cart_id: str) -> int:
         """
-        Return how many distinct items are in the cart.
+        Return how many distinct items are in the cart, as a COUNT on the
+        server instead of shipping the rows over just to len() them.
         """
-        return len(self.get_cart_items(cart_id))
+        self._ensure_cart_items_table()
+        cur = self._execute(
+            "SELECT COUNT(*) AS cnt FROM cart_items WHERE cart_id = %s;",
+            (cart_id,),
+        )
+        row = cur.fetchone()
+        return int(getattr(row, "cnt", 0) or 0)
 
     def is_item_in_cart(self, cart_id: str, item_id: str) -> bool:
         """
         Check whether a given item is already in the cart.
         """
         self._ensure_cart_items_table()
-        cur = self._execute(
-            "SELECT quantity FROM cart_items WHERE cart_id = %s AND item_id = %s LIMIT 1;",
-            (cart_id, item_id),
-        )
+        cur = self._execute(self._SQL_IS_ITEM_IN_CART, (cart_id, item_id))
         return cur.fetchone() is not None
 
     def add_item_to_cart(
@@ -1113,6 +1376,37 @@ class DBInterface:
         """
         self._execute(query, (cart_id, item_id, quantity))
 
+    def reserve_item(self, cart_id: str, item_id: str, quantity: int = 1) -> bool:
+        """
+        Atomically reserve an inventory item for a cart. The conditional
+        UPDATE doubles as the availability check: it only matches while the
+        item is still 'available', so two carts can never both grab the
+        same piece. Returns False (without touching the cart) when the
+        item was already taken or does not exist.
+        """
+        self._ensure_cart_items_table()
+        now = _utc_now_str()
+        cur = self._execute(
+            """
+            UPDATE inventory
+            SET status = 'pending', updated_at = %s
+            WHERE id = %s AND LOWER(COALESCE(status, '')) = 'available';
+            """,
+            (now, item_id),
+        )
+        _invalidate_cached_items([item_id])
+        if cur.rowcount == 0:
+            return False
+        self._execute(
+            """
+            INSERT INTO cart_items (cart_id, item_id, quantity)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE quantity = VALUES(quantity);
+            """,
+            (cart_id, item_id, quantity),
+        )
+        return True
+
     def remove_item_from_cart(self, cart_id: str, item_id: str):
         """
         Remove a single item from the cart.
@@ -1133,6 +1427,37 @@ class DBInterface:
             (cart_id,),
         )
 
+    def clear_cart_and_release_items(self, cart_id: str):
+        """
+        Empty a cart and flip any of its items that are no longer held in
+        any other cart back to 'available', in three fixed statements.
+
+        MySQL has no DELETE ... RETURNING, so the item ids are captured
+        first; the release UPDATE re-checks cart membership itself, so an
+        item concurrently added to another cart between the statements is
+        left alone. Returns the list of item ids that were in the cart.
+        """
+        self._ensure_cart_items_table()
+        item_ids = sorted(self.get_cart_item_ids(cart_id))
+        self._execute(
+            "DELETE FROM cart_items WHERE cart_id = %s;",
+            (cart_id,),
+        )
+        if item_ids:
+            placeholders = ", ".join(["%s"] * len(item_ids))
+            self._execute(
+                f"""
+                UPDATE inventory
+                SET status = 'available'
+                WHERE id IN ({placeholders})
+                  AND NOT EXISTS (
+                      SELECT 1 FROM cart_items c WHERE c.item_id = inventory.id
+                  );
+                """,
+                item_ids,
+            )
+        return item_ids
+
     def normalize_cart_items(self, cart_id: str):
         """
         Re-insert all items in a cart without TTL so they become long-lived.
@@ -1140,15 +1465,30 @@ class DBInterface:
         """
         return
 
-    def item_is_in_any_cart(self, item_id: str) -> bool:
+    def items_in_any_cart(self, item_ids) -> set:
         """
-        Return True if the given item_id exists in any cart.
+        Return the subset of the given item_ids that still sit in at least
+        one cart, using a single IN query instead of probing per item.
         """
+        if not item_ids:
+            return set()
         self._ensure_cart_items_table()
+        unique_ids = list(dict.fromkeys(str(i) for i in item_ids if i))
+        if not unique_ids:
+            return set()
+        placeholders = ", ".join(["%s"] * len(unique_ids))
         cur = self._execute(
-            "SELECT cart_id FROM cart_items WHERE item_id = %s LIMIT 1;",
-            (item_id,),
+            f"SELECT DISTINCT item_id FROM cart_items WHERE item_id IN ({placeholders});",
+            unique_ids,
         )
+        return {str(row.item_id) for row in cur.fetchall()}
+
+    def item_is_in_any_cart(self, item_id: str) -> bool:
+        """
+        Return True if the given item_id exists in any cart.
+        """
+        self._ensure_cart_items_table()
+        cur = self._execute(self._SQL_ITEM_IN_ANY_CART, (item_id,))
         return cur.fetchone() is not None
 
     # ------------------------------------------------------------------
@@ -1175,7 +1515,7 @@ class DBInterface:
         """
         if not old_name or not new_name:
             return
-        now = datetime.utcnow().isoformat(sep=" ", timespec="seconds")
+        now = _utc_now_str()
         self._execute(
             """
             UPDATE inventory
@@ -1184,6 +1524,9 @@ class DBInterface:
             """,
             (new_name, now, old_name),
         )
+        # The affected ids aren't known here; drop the whole item cache.
+        with _item_cache_lock:
+            _item_cache.clear()
 
     def delete_category_and_reassign(self, category_name: str, fallback: str = "Other"):
         """
@@ -1193,7 +1536,7 @@ class DBInterface:
         if not category_name:
             return
         fallback = fallback or "Other"
-        now = datetime.utcnow().isoformat(sep=" ", timespec="seconds")
+        now = _utc_now_str()
         self._execute(
             """
             UPDATE inventory
@@ -1202,6 +1545,9 @@ class DBInterface:
             """,
             (fallback, now, category_name),
         )
+        # Bulk update with unknown ids; drop the whole item cache.
+        with _item_cache_lock:
+            _item_cache.clear()
 
     def add_category_if_missing(self, category_name: str):
         """
@@ -1225,7 +1571,7 @@ class DBInterface:
             return
         # Otherwise insert a minimal placeholder row so that the category appears.
         item_id = str(uuid4())
-        now = datetime.utcnow().isoformat(sep=" ", timespec="seconds")
+        now = _utc_now_str()
         self._execute(
             """
             INSERT INTO inventory (id, name, price, description, image_url, created_at, updated_at, status, category)
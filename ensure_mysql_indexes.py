@@ -33,10 +33,39 @@ def main():
         "ALTER TABLE inventory ADD INDEX idx_inventory_status_category (status, category);",
         "ALTER TABLE inventory ADD INDEX idx_inventory_price (price);",
         "ALTER TABLE inventory ADD INDEX idx_inventory_views_likes (views, likes);",
+        # Related-items lookup filters on category alone, which the
+        # (status, category) composite above cannot serve.
+        "ALTER TABLE inventory ADD INDEX idx_inventory_category (category);",
+        # Inventory listing: satisfy ORDER BY created_at DESC / views DESC
+        # after the status filter without a filesort.
+        "ALTER TABLE inventory ADD INDEX idx_inventory_status_created (status, created_at DESC);",
+        "ALTER TABLE inventory ADD INDEX idx_inventory_status_views (status, views DESC);",
         # Password reset tokens: optional helper index on user_id
         "ALTER TABLE password_reset_tokens ADD INDEX idx_password_reset_user_id (user_id);",
+        # Keeps the expired-token sweep an index range scan.
+        "ALTER TABLE password_reset_tokens ADD INDEX idx_password_reset_expires (expires_at);",
     ]
 
+    # Password reset tokens: expiry is stored as epoch seconds now. Only
+    # convert the column (and drop stragglers that would become bogus
+    # DATETIME->number values) when it isn't BIGINT yet, so re-running
+    # this script doesn't wipe live reset tokens on every deploy.
+    cur.execute(
+        """
+        SELECT DATA_TYPE FROM information_schema.columns
+        WHERE table_schema = %s
+          AND table_name = 'password_reset_tokens'
+          AND column_name = 'expires_at';
+        """,
+        (database,),
+    )
+    row = cur.fetchone()
+    if row and row[0].lower() != "bigint":
+        statements[-1:-1] = [
+            "DELETE FROM password_reset_tokens;",
+            "ALTER TABLE password_reset_tokens MODIFY expires_at BIGINT;",
+        ]
+
     for stmt in statements:
         try:
             print(f"Executing: {stmt}")
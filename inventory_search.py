@@ -1,14 +1,29 @@
+import functools
 import math
 import os
 import re
 from typing import List, Dict, Any
 
 from openai import OpenAI
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process, utils
 
 from database import DBInterface
 
 
+@functools.lru_cache(maxsize=8192)
+def _item_tokens_cached(item_id: str, updated_at, text: str) -> frozenset:
+    """
+    Tokenize one item's search text, memoized per (item id, updated_at).
+
+    Item text only changes when the row is edited, which also bumps
+    updated_at, so the cache invalidates itself naturally on edits while
+    every other search request reuses the precomputed token set instead
+    of re-running the regex and set construction per item.
+    """
+    tokens = re.findall(r"\w+", text or "")
+    return frozenset(t.lower() for t in tokens if t)
+
+
 class InventorySearch:
     """
     Helper class for performing keyword + semantic search over the inventory table.
@@ -93,29 +108,41 @@ class InventorySearch:
         return " ".join(part for part in [item_id, name, desc, category] if part).strip()
 
     @staticmethod
-    def _fuzzy_token_score(query_tokens: set, item_tokens: set) -> float:
-        """
-        Compute a fuzzy token similarity score in [0, 1] that is tolerant of
-        minor spelling errors and typos, using RapidFuzz.
+    def _fuzzy_scores(query: str, texts: List[str]) -> List[float]:
         """
-        if not query_tokens or not item_tokens:
-            return 0.0
-
-        total_best = 0.0
-        for q in query_tokens:
-            best = 0.0
-            for t in item_tokens:
-                score = fuzz.ratio(q, t)
-                if score > best:
-                    best = score
-            total_best += best
+        Compute fuzzy similarity scores in [0, 1] between the query and every
+        text in `texts`, tolerant of minor spelling errors and typos.
 
-        # Average best-match ratio across all query tokens and normalize to [0,1]
-        return total_best / (100.0 * len(query_tokens))
+        All texts are scored in a single rapidfuzz process.extract call, so
+        the whole comparison loop runs in C instead of dispatching one
+        scorer call per item from Python.
+        """
+        scores = [0.0] * len(texts)
+        if not query or not texts:
+            return scores
+        matches = process.extract(
+            query,
+            texts,
+            scorer=fuzz.token_set_ratio,
+            processor=utils.default_process,
+            limit=None,
+        )
+        for _choice, score, index in matches:
+            scores[index] = score / 100.0
+        return scores
 
-    def search(self, query: str, top_k: int = 20) -> List[Dict[str, Any]]:
+    def search(
+        self,
+        query: str,
+        top_k: int = 20,
+        items: List[Any] | None = None,
+    ) -> List[Dict[str, Any]]:
         """
-        Perform a combined keyword + semantic search over all inventory items.
+        Perform a combined keyword + semantic search over inventory items.
+
+        When `items` is provided (e.g. rows already narrowed down by a SQL
+        filter), only those rows are scored; otherwise the whole inventory
+        table is loaded and searched.
 
         Returns a list of results sorted by combined score, where each result is:
             {
@@ -129,15 +156,28 @@ class InventorySearch:
         if not query:
             return []
 
-        # Load all items from the inventory table
-        items = list(self.db.get_all_data("inventory"))
+        # Load all items from the inventory table unless the caller
+        # already narrowed them down.
+        if items is None:
+            items = list(self.db.get_all_data("inventory"))
+        else:
+            items = list(items)
         if not items:
             return []
 
-        # Build plain-text representations and tokens for keyword scoring
+        # Build plain-text representations and tokens for keyword scoring.
+        # Item tokens are cached per (id, updated_at) so repeat searches
+        # skip re-tokenizing an unchanged catalog.
         item_texts: List[str] = [self._item_text(item) for item in items]
         query_tokens = self._normalize_tokens(query)
-        item_tokens_list = [self._normalize_tokens(text) for text in item_texts]
+        item_tokens_list = [
+            _item_tokens_cached(
+                str(getattr(item, "id", "") or ""),
+                getattr(item, "updated_at", None),
+                text,
+            )
+            for item, text in zip(items, item_texts)
+        ]
         # Also keep category tokens separately so we can weight category matches higher
         category_texts: List[str] = [
             str(getattr(item, "category", "") or "") for item in items
@@ -157,9 +197,14 @@ class InventorySearch:
         query_vec = vectors[0]
         item_vecs = vectors[1:]
 
+        # Batch the fuzzy comparisons: one rapidfuzz call covering every item
+        # text, and one covering every category text.
+        fuzzy_keyword_scores = self._fuzzy_scores(query, item_texts)
+        fuzzy_category_scores = self._fuzzy_scores(query, category_texts)
+
         results: List[Dict[str, Any]] = []
-        for item, item_vec, item_tokens, category_tokens in zip(
-            items, item_vecs, item_tokens_list, category_tokens_list
+        for index, (item, item_vec, item_tokens, category_tokens) in enumerate(
+            zip(items, item_vecs, item_tokens_list, category_tokens_list)
         ):
             semantic_score = self._cosine_similarity(query_vec, item_vec)
             exact_keyword_score = (
@@ -167,9 +212,8 @@ class InventorySearch:
                 if query_tokens
                 else 0.0
             )
-            fuzzy_keyword_score = self._fuzzy_token_score(query_tokens, item_tokens)
             # Use the stronger of exact token overlap or fuzzy match as the keyword score
-            keyword_score = max(exact_keyword_score, fuzzy_keyword_score)
+            keyword_score = max(exact_keyword_score, fuzzy_keyword_scores[index])
 
             # Compute a separate category score (exact + fuzzy) so we can weight it more
             exact_category_score = (
@@ -177,10 +221,7 @@ class InventorySearch:
                 if query_tokens
                 else 0.0
             )
-            fuzzy_category_score = self._fuzzy_token_score(
-                query_tokens, category_tokens
-            )
-            category_score = max(exact_category_score, fuzzy_category_score)
+            category_score = max(exact_category_score, fuzzy_category_scores[index])
 
             # Weight category matches more heavily, but still factor in overall semantics
             # and general keyword matches.
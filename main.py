@@ -1,21 +1,64 @@
-from flask import Flask, render_template, request, url_for, jsonify, abort, redirect, session, g
+from flask import Flask, render_template, request, url_for, jsonify, abort, redirect, session, g, make_response
+from flask.json.provider import JSONProvider
 from database import DBInterface, parse_roles
+import orjson
 from inventory_search import InventorySearch
 from types import SimpleNamespace
-from datetime import datetime, timedelta
+from datetime import timedelta
+import functools
 import hashlib
+import hmac
+import heapq
 import os
-import re
+import secrets
+import atexit
 import smtplib
+import string
+import threading
+import time
 from email.message import EmailMessage
 import uuid
 import requests
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 from rapidfuzz import fuzz
 import math
 
+class OrjsonProvider(JSONProvider):
+    """
+    JSON provider backed by orjson, which serializes and parses noticeably
+    faster than the stdlib json module used by Flask's default provider.
+    Keeps jsonify()/request.get_json() working unchanged for the API endpoints.
+    """
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+Flask.json_provider_class = OrjsonProvider
+
 app = Flask(__name__)
 app.secret_key = "replace-this-with-a-random-secret-key"
 
+# Optional server-side session store. The default signed-cookie session
+# ships the whole session dict (and re-HMACs it) with every request;
+# pointing SESSION_REDIS_URL at a Redis instance keeps only a session id
+# in the cookie and lets gunicorn workers share sessions. Needs the
+# Flask-Session and redis packages, which is why the imports live inside
+# the branch — deployments without the env var don't require them.
+_session_redis_url = os.environ.get("SESSION_REDIS_URL")
+if _session_redis_url:
+    import redis
+    from flask_session import Session
+
+    app.config["SESSION_TYPE"] = "redis"
+    app.config["SESSION_REDIS"] = redis.Redis.from_url(_session_redis_url)
+    app.config["SESSION_USE_SIGNER"] = True
+    Session(app)
+
 # PayPal configuration (use environment variables in real deployments)
 PAYPAL_CLIENT_ID = os.environ.get("PAYPAL_CLIENT_ID", "")
 PAYPAL_CLIENT_SECRET = os.environ.get("PAYPAL_CLIENT_SECRET", "")
@@ -29,6 +72,11 @@ SMTP_PORT = int(os.environ.get("SMTP_PORT", "587"))
 SMTP_USERNAME = os.environ.get("SMTP_USERNAME", "")
 SMTP_PASSWORD = os.environ.get("SMTP_PASSWORD", "")
 
+# How long a password-reset link stays valid. Computed once at import;
+# token expiries are stored as epoch seconds, so only the int is needed.
+RESET_TOKEN_TTL = timedelta(minutes=5)
+_RESET_TOKEN_TTL_SECONDS = int(RESET_TOKEN_TTL.total_seconds())
+
 
 def get_db() -> DBInterface:
     """
@@ -41,13 +89,65 @@ def get_db() -> DBInterface:
     return g.db
 
 
+# When set, requests that issue more queries than this log a warning at
+# teardown. Meant for development runs to catch N+1 regressions early;
+# leave unset in production for zero overhead beyond the counter itself.
+_DB_QUERY_WARN_THRESHOLD = int(os.environ.get("DB_QUERY_WARN_THRESHOLD", "0"))
+
+
 @app.teardown_appcontext
 def close_db(exception=None):
     db = g.pop("db", None)
     if db is not None:
+        if (
+            _DB_QUERY_WARN_THRESHOLD
+            and db.query_count > _DB_QUERY_WARN_THRESHOLD
+        ):
+            app.logger.warning(
+                "Request %s issued %d DB queries (threshold %d)",
+                request.path if request else "?",
+                db.query_count,
+                _DB_QUERY_WARN_THRESHOLD,
+            )
         db.shutdown()
 
 
+def _load_user_cached(db, user_id):
+    """
+    Fetch a user row at most once per request. Routes that need the
+    current user's row more than once (e.g. the profile POST flow) share
+    it through g instead of repeating the lookup.
+    """
+    cache = g.setdefault("_user_rows", {})
+    uid = str(user_id)
+    if uid not in cache:
+        cache[uid] = db.get_user_by_id(uid)
+    return cache[uid]
+
+
+def _invalidate_user_cached(user_id):
+    """Drop a user row from the per-request cache after an update."""
+    cache = g.get("_user_rows")
+    if cache:
+        cache.pop(str(user_id), None)
+
+
+def _build_session_user(roles, **fields):
+    """
+    Build the session 'user' dict. Admin/guest membership is computed once
+    here, at login time, so per-request checks read precomputed booleans
+    instead of scanning the role list on every render. Roles stay a list
+    because the session cookie is JSON-serialized.
+    """
+    roles = list(roles)
+    fields["roles"] = roles
+    fields["flags"] = {
+        "admin": "admin" in roles,
+        "guest": "guest" in roles,
+    }
+    return fields
+
+
 def get_or_create_cart_id() -> str:
     """
     Return the current cart_id (UUID string) for this browser session,
@@ -55,7 +155,9 @@ def get_or_create_cart_id() -> str:
     """
     cart_id = session.get('cart_id')
     if not cart_id:
-        cart_id = str(uuid.uuid4())
+        # token_hex goes straight from os.urandom to a hex string with no
+        # intermediate UUID object; this runs on any first-touch add-to-cart.
+        cart_id = secrets.token_hex(16)
         session['cart_id'] = cart_id
     return cart_id
 
@@ -68,17 +170,33 @@ def inject_globals():
     cart_count = 0
 
     if cart_id:
-        db = get_db()
-        cart_count = db.get_cart_item_count(cart_id)
+        # The count only changes through the cart-mutating routes, which all
+        # drop the cached value; every other page render reuses the session
+        # copy instead of querying the DB.
+        cart_count = session.get('cart_count')
+        if cart_count is None:
+            db = get_db()
+            cart_count = db.get_cart_item_count(cart_id)
+            session['cart_count'] = cart_count
 
     user_first_name = user.get("name")
     roles = user.get("roles") or []
-    is_guest = "guest" in roles
-    is_admin = "admin" in roles
-
-    login_error = session.pop("login_error", None)
-    login_forgot_mode = session.pop("login_forgot_mode", False)
-    force_login_overlay = session.pop("force_login_overlay", False)
+    # Prefer the flags computed at login; fall back to scanning the role
+    # list for sessions issued before the flags existed.
+    flags = user.get("flags") or {}
+    is_guest = flags.get("guest", "guest" in roles)
+    is_admin = flags.get("admin", "admin" in roles)
+
+    # Only pop when the key is actually present: pop() marks the session
+    # modified even on a miss, which would force re-signing and re-setting
+    # the cookie on every single response.
+    login_error = session.pop("login_error") if "login_error" in session else None
+    login_forgot_mode = (
+        session.pop("login_forgot_mode") if "login_forgot_mode" in session else False
+    )
+    force_login_overlay = (
+        session.pop("force_login_overlay") if "force_login_overlay" in session else False
+    )
 
     return {
         "cart_count": cart_count,
@@ -92,6 +210,39 @@ def inject_globals():
     }
 
 
+@app.before_request
+def _load_identity():
+    """
+    Resolve the session user once per request. Handlers read g.user,
+    g.roles, g.is_admin, and g.is_guest instead of re-fetching the
+    session dict and re-scanning the role list in every route.
+    """
+    if request.endpoint == "static":
+        return
+    user = session.get("user") or {}
+    g.user = user
+    g.roles = frozenset(user.get("roles") or ())
+    # Login precomputes admin/guest flags (_build_session_user); fall
+    # back to the role set for sessions minted before that change.
+    flags = user.get("flags") or {}
+    g.is_admin = flags.get("admin", "admin" in g.roles)
+    g.is_guest = flags.get("guest", "guest" in g.roles)
+
+
+# Endpoints reachable without a session. A frozenset makes the per-request
+# membership test a single hash lookup; this hook runs on every request,
+# static assets included.
+_ANONYMOUS_ALLOWED_ENDPOINTS = frozenset({
+    "home",
+    "about",
+    "login",
+    "signup",
+    "forgot_password",
+    "forgot_password_send_link",
+    "reset_password",
+})
+
+
 @app.before_request
 def redirect_anonymous_to_home():
     """
@@ -99,30 +250,90 @@ def redirect_anonymous_to_home():
     and they try to access any page other than the home page,
     send them to the home page, where the login modal will appear.
     """
-    # Allow these endpoints without redirect
-    if request.endpoint in (
-        "home",
-        "about",
-        "login",
-        "signup",
-        "forgot_password",
-        "forgot_password_send_link",
-        "reset_password",
-        "static",
-    ):
+    endpoint = request.endpoint
+    # Static assets are the most common request on asset-heavy pages;
+    # bail out before any other work.
+    if endpoint == "static":
         return
 
-    # Some requests might not have a resolvable endpoint
-    if request.endpoint is None:
+    # Allow these endpoints without redirect. Some requests might not
+    # have a resolvable endpoint at all.
+    if endpoint is None or endpoint in _ANONYMOUS_ALLOWED_ENDPOINTS:
         return
 
     # If user is not in session, force them back to home
     if "user" not in session:
         return redirect(url_for("home"))
 
+# Static asset paths handed to the landing templates. Built once at import
+# so each render reuses the same dict instead of allocating fresh literals.
+_STATIC_ASSET_CTX = {
+    "image_path": "./static/images",
+    "js_path": "static/js/script.js",
+    "css_path": "static/css/style.css",
+}
+
+# The home-page sections change when someone edits the catalog, not per
+# request, so most landing-page hits can reuse the last computed pair for
+# a short window instead of querying at all. Catalog-mutating admin
+# routes drop the entry immediately so edits show up right away.
+_HOME_SECTIONS_TTL_SECONDS = 60
+_home_sections_cache = {"expires_at": 0.0, "payload": None}
+_home_sections_lock = threading.Lock()
+
+
+def _get_home_sections(db):
+    """Return (top_picks, category_spotlights), cached for a short TTL."""
+    now = time.monotonic()
+    with _home_sections_lock:
+        payload = _home_sections_cache["payload"]
+        if payload is not None and now < _home_sections_cache["expires_at"]:
+            return payload
+    payload = (db.get_top_picks(10), db.get_category_spotlights(4))
+    with _home_sections_lock:
+        _home_sections_cache["payload"] = payload
+        _home_sections_cache["expires_at"] = now + _HOME_SECTIONS_TTL_SECONDS
+    return payload
+
+
+def _invalidate_home_sections():
+    """Drop the cached home-page sections after a catalog change."""
+    with _home_sections_lock:
+        _home_sections_cache["payload"] = None
+
+
+# The distinct-category list only changes when an admin edits products or
+# manages categories, yet every inventory render was re-querying it. Keep
+# the last result around for a few minutes and let the mutating routes
+# drop it explicitly.
+_CATEGORIES_TTL_SECONDS = 300
+_categories_cache = {"expires_at": 0.0, "payload": None}
+_categories_lock = threading.Lock()
+
+
+def _get_all_categories_cached(db):
+    """Return the raw category list, cached for a short TTL."""
+    now = time.monotonic()
+    with _categories_lock:
+        payload = _categories_cache["payload"]
+        if payload is not None and now < _categories_cache["expires_at"]:
+            return payload
+    payload = db.get_all_categories()
+    with _categories_lock:
+        _categories_cache["payload"] = payload
+        _categories_cache["expires_at"] = now + _CATEGORIES_TTL_SECONDS
+    return payload
+
+
+def _invalidate_categories():
+    """Drop the cached category list after a category-affecting change."""
+    with _categories_lock:
+        _categories_cache["payload"] = None
+
+
 @app.route('/', methods=['GET', 'POST'])
 def run():
-    return redirect(url_for("home"))    
+    return redirect(url_for("home"))
 
 @app.route('/home', methods=['GET', 'POST'])
 def home():
@@ -130,87 +341,11 @@ def home():
     top_picks = []
     category_spotlights = []
     try:
-        # Build a small "Top Picks" set for the home page:
-        #  - status: available
-        #  - not on discount (no original_price > price)
-        #  - lowest view counts first (surface under-discovered items)
-        all_items = list(db.get_all_data("inventory"))
-
-        def _is_top_pick_candidate(it):
-            status = (getattr(it, "status", "") or "").lower()
-            if status != "available":
-                return False
-
-            price = getattr(it, "price", None)
-            original_price = getattr(it, "original_price", None)
-            try:
-                price = float(price)
-            except (TypeError, ValueError):
-                return False
-
-            try:
-                original_price = float(original_price)
-            except (TypeError, ValueError):
-                original_price = None
-
-            # Exclude discounted items (where original_price is a valid number and > price)
-            if original_price is not None and original_price > price:
-                return False
-
-            return True
-
-        candidates = [it for it in all_items if _is_top_pick_candidate(it)]
-
-        def _view_count(it):
-            v = getattr(it, "views", 0) or 0
-            try:
-                return int(v)
-            except (TypeError, ValueError):
-                return 0
-
-        # Sort by view count ascending so low-view items show first
-        candidates.sort(key=_view_count)
-        top_picks = candidates[:10]
-
-        # Build up to four "shop by category" spotlights using the same inventory
-        # data we already loaded:
-        #   - group all listed items by category
-        #   - sort categories by descending item count
-        #   - for each of the top categories, choose a single representative item
-        #     (prefer one with an image_url when available)
-        category_buckets: dict[str, list] = {}
-        for it in all_items:
-            cat = (getattr(it, "category", None) or "Other").strip()
-            if not cat:
-                cat = "Other"
-            category_buckets.setdefault(cat, []).append(it)
-
-        # Sort categories by how many items they contain (most items first)
-        sorted_categories = sorted(
-            category_buckets.items(),
-            key=lambda kv: len(kv[1]),
-            reverse=True,
-        )
-
-        category_spotlights = []
-        for cat, items_in_cat in sorted_categories:
-            # Skip the generic "Other" bucket; only show concrete categories.
-            if cat == "Other" or not items_in_cat:
-                continue
-            # Prefer an item with a non-empty image_url, otherwise fall back to the first.
-            with_image = [
-                it for it in items_in_cat
-                if getattr(it, "image_url", None)
-            ]
-            representative = with_image[0] if with_image else items_in_cat[0]
-            category_spotlights.append(
-                {
-                    "category": cat,
-                    "item": representative,
-                }
-            )
-            if len(category_spotlights) >= 4:
-                break
+        # Both sections come straight from SQL now: "Top Picks" (available,
+        # non-discounted, lowest view counts first) and up to four "shop by
+        # category" spotlights, ~14 rows total instead of the whole table —
+        # and the pair is reused across requests for a short TTL.
+        top_picks, category_spotlights = _get_home_sections(db)
     except Exception:
         # If anything goes wrong loading top picks, fail silently and show none.
         top_picks = []
@@ -218,22 +353,65 @@ def home():
 
     return render_template(
         "index.html",
-        image_path='./static/images',
-        js_path='static/js/script.js',
-        css_path='static/css/style.css',
         top_picks=top_picks,
         category_spotlights=category_spotlights,
+        **_STATIC_ASSET_CTX,
     )
 
 
 @app.route('/about', methods=['GET'])
 def about():
-    return render_template(
-        "about.html",
-        image_path='./static/images',
-        js_path='static/js/script.js',
-        css_path='static/css/style.css',
-    )
+    return render_template("about.html", **_STATIC_ASSET_CTX)
+
+
+# One SMTP session per process, shared by both send helpers. The TCP
+# connect, STARTTLS and AUTH exchange dominate the cost of delivering a
+# single message, so keeping the session open reduces each send to just
+# the message transfer. Access is serialized through the lock since
+# smtplib connections are not thread-safe.
+_smtp_lock = threading.Lock()
+_smtp_connection = None
+
+
+def _connect_smtp():
+    server = smtplib.SMTP(SMTP_HOST, SMTP_PORT)
+    server.starttls()
+    if SMTP_USERNAME and SMTP_PASSWORD:
+        server.login(SMTP_USERNAME, SMTP_PASSWORD)
+    return server
+
+
+def _send_email(msg: EmailMessage) -> None:
+    """
+    Deliver a message over the shared SMTP session, reconnecting when the
+    cached session has gone stale (checked with a cheap NOOP).
+    """
+    global _smtp_connection
+    with _smtp_lock:
+        server = _smtp_connection
+        if server is not None:
+            try:
+                server.noop()
+            except Exception:
+                try:
+                    server.close()
+                except Exception:
+                    pass
+                server = None
+        if server is None:
+            server = _connect_smtp()
+            _smtp_connection = server
+        server.send_message(msg)
+
+
+@atexit.register
+def _close_smtp_connection() -> None:
+    with _smtp_lock:
+        if _smtp_connection is not None:
+            try:
+                _smtp_connection.quit()
+            except Exception:
+                pass
 
 
 def send_contact_email(name: str, from_email: str, message_body: str) -> None:
@@ -256,11 +434,7 @@ def send_contact_email(name: str, from_email: str, message_body: str) -> None:
     )
 
     try:
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-            server.starttls()
-            if SMTP_USERNAME and SMTP_PASSWORD:
-                server.login(SMTP_USERNAME, SMTP_PASSWORD)
-            server.send_message(msg)
+        _send_email(msg)
     except Exception:
         # In production you might want to log this exception.
         pass
@@ -287,28 +461,70 @@ def send_password_reset_email(to_email: str, reset_url: str) -> None:
     )
 
     try:
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-            server.starttls()
-            if SMTP_USERNAME and SMTP_PASSWORD:
-                server.login(SMTP_USERNAME, SMTP_PASSWORD)
-            server.send_message(msg)
+        _send_email(msg)
     except Exception:
         # In production you might want to log this exception.
         pass
 
 
+# Worker pool for outbound email. SMTP involves a TCP connect, STARTTLS,
+# and AUTH before the message even goes out, so sending inline would hold
+# the request open for however long the mail server takes to answer.
+_email_executor = ThreadPoolExecutor(max_workers=4)
+
+
+def send_contact_email_async(name: str, from_email: str, message_body: str) -> None:
+    """Queue a contact email on the background pool and return immediately."""
+    _email_executor.submit(send_contact_email, name, from_email, message_body)
+
+
+def send_password_reset_email_async(to_email: str, reset_url: str) -> None:
+    """Queue a password-reset email on the background pool and return immediately."""
+    _email_executor.submit(send_password_reset_email, to_email, reset_url)
+
+
+# Bits for the character classes a strong password must cover.
+_PW_UPPER, _PW_LOWER, _PW_DIGIT, _PW_SPECIAL = 1, 2, 4, 8
+_PW_ALL = _PW_UPPER | _PW_LOWER | _PW_DIGIT | _PW_SPECIAL
+
+
 def password_is_strong(password: str) -> bool:
     """
-    Ensure the password contains at least one uppercase, one lowercase,
-    one digit, and one special character.
+    Ensure the password is at least 8 characters and contains at least one
+    uppercase, one lowercase, one digit, and one special character.
+
+    One pass over the string accumulating a class bitmask, bailing out as
+    soon as all four classes have been seen — no regex engine involved.
     """
-    if len(password) < 8:
+    if not password or len(password) < 8:
         return False
-    has_upper = bool(re.search(r"[A-Z]", password))
-    has_lower = bool(re.search(r"[a-z]", password))
-    has_digit = bool(re.search(r"\d", password))
-    has_special = bool(re.search(r"[^A-Za-z0-9]", password))
-    return has_upper and has_lower and has_digit and has_special
+    mask = 0
+    for ch in password:
+        o = ord(ch)
+        if 65 <= o <= 90:
+            mask |= _PW_UPPER
+        elif 97 <= o <= 122:
+            mask |= _PW_LOWER
+        elif 48 <= o <= 57:
+            mask |= _PW_DIGIT
+        else:
+            mask |= _PW_SPECIAL
+        if mask == _PW_ALL:
+            return True
+    return False
+
+
+@functools.lru_cache(maxsize=1024)
+def _derive_salt(email: str, phone: str) -> str:
+    """
+    Derive the deterministic UUID-based salt for an (email, phone) pair.
+
+    The derivation involves a SHA-1 (via uuid5), so memoize it: repeated
+    logins (or brute-force attempts) for the same account reuse the cached
+    hex salt instead of recomputing it on every POST.
+    """
+    base = (email or "").strip().lower() + (phone or "").strip()
+    return uuid.uuid5(uuid.NAMESPACE_DNS, base or "anonymous").hex
 
 
 def hash_user_password(email: str, phone: str, password: str) -> str:
@@ -318,43 +534,106 @@ def hash_user_password(email: str, phone: str, password: str) -> str:
       - unique UUID derived from email+phone
       - hashed user password stored in DB
     """
-    base = (email or "").strip().lower() + (phone or "").strip()
-    uuid_salt = uuid.uuid5(uuid.NAMESPACE_DNS, base or "anonymous")
-    combined = (password or "") + uuid_salt.hex
+    combined = (password or "") + _derive_salt(email, phone)
     return hashlib.sha256(combined.encode("utf-8")).hexdigest()
 
-def normalize_word(w):
-    """Very simple normalization to make plural/singular matches more forgiving."""
-    w = w.lower()
-    if len(w) > 3 and w.endswith("es"):
-        return w[:-2]
-    if len(w) > 3 and w.endswith("s"):
-        return w[:-1]
-    return w
+
+# In-process throttle for repeated failed logins: (email, remote_addr) ->
+# (window_start, failure_count). Expired entries are discarded lazily when
+# their key is touched again; a hard size cap below handles traffic that
+# rotates emails/IPs and so never revisits a key.
+_FAILED_LOGIN_WINDOW_SECONDS = 60
+_FAILED_LOGIN_MAX_ATTEMPTS = 5
+_FAILED_LOGIN_MAX_ENTRIES = 10_000
+_failed_logins: dict = {}
+
+
+def _login_attempts_exceeded(email: str, remote_addr: str) -> bool:
+    """
+    Return True if this (email, ip) pair has failed too many logins recently.
+    Checked before any hashing so brute-force traffic stays cheap.
+    """
+    entry = _failed_logins.get((email, remote_addr))
+    if not entry:
+        return False
+    window_start, count = entry
+    if time.time() - window_start > _FAILED_LOGIN_WINDOW_SECONDS:
+        _failed_logins.pop((email, remote_addr), None)
+        return False
+    return count >= _FAILED_LOGIN_MAX_ATTEMPTS
+
+
+def _record_failed_login(email: str, remote_addr: str) -> None:
+    """Record one failed login attempt for the throttle above."""
+    now = time.time()
+    key = (email, remote_addr)
+    if key not in _failed_logins and len(_failed_logins) >= _FAILED_LOGIN_MAX_ENTRIES:
+        # At capacity with a brand-new key: sweep expired windows, and if
+        # a rotating-key flood left nothing expired, start over — losing
+        # at most one window of throttle history.
+        expired = [
+            k
+            for k, (start, _) in _failed_logins.items()
+            if now - start > _FAILED_LOGIN_WINDOW_SECONDS
+        ]
+        for k in expired:
+            _failed_logins.pop(k, None)
+        if len(_failed_logins) >= _FAILED_LOGIN_MAX_ENTRIES:
+            _failed_logins.clear()
+    window_start, count = _failed_logins.get(key, (now, 0))
+    if now - window_start > _FAILED_LOGIN_WINDOW_SECONDS:
+        window_start, count = now, 0
+    _failed_logins[key] = (window_start, count + 1)
+
+# Translation table that blanks out ASCII punctuation, so tokenizing is a
+# single C-level translate + split rather than a regex scan per call.
+_TOKEN_TRANS = str.maketrans({c: " " for c in string.punctuation})
 
 
 def text_to_normalized_tokens(text):
-    """Split text into words and normalize each one."""
-    words = re.findall(r"\w+", (text or ""))
-    return {normalize_word(w) for w in words if w}
+    """
+    Split text into words and normalize each one, trimming simple plural
+    suffixes so plural/singular matches are more forgiving. The stemming is
+    inlined in the comprehension (the input is already lowercased), saving
+    a Python function call per token.
+    """
+    words = (text or "").lower().translate(_TOKEN_TRANS).split()
+    return {
+        w[:-2] if len(w) > 3 and w.endswith("es")
+        else (w[:-1] if len(w) > 3 and w.endswith("s") else w)
+        for w in words
+    }
 
 
 def tokens_fuzzy_match(q_tokens, item_tokens, threshold=80):
     """
-    Return True if any query token is a fuzzy match to any item token,
+    Return True if the query tokens are a fuzzy match for the item tokens,
     using rapidfuzz with the given similarity threshold (0–100).
+
+    Instead of scoring every (query token, item token) pair in a Python
+    loop, hand both sides to token_set_ratio in one call: the set
+    intersection/difference runs in C, and score_cutoff lets the scorer
+    bail out as soon as the score cannot reach the threshold.
     """
-    for q in q_tokens:
-        for t in item_tokens:
-            if fuzz.ratio(q, t) >= threshold:
-                return True
-    return False
+    if not q_tokens or not item_tokens:
+        return False
+    score = fuzz.token_set_ratio(
+        " ".join(q_tokens),
+        " ".join(item_tokens),
+        score_cutoff=threshold,
+    )
+    return bool(score)
 
 
+@functools.lru_cache(maxsize=8)
 def _prepare_categories_for_select(raw_categories):
     """
     Normalize and order category names for selection controls.
     All available categories are included, with 'Other' forced to the end.
+
+    Takes a tuple (hashable) so identical category sets across requests
+    hit the lru_cache instead of re-sorting; callers must not mutate the
+    returned list.
     """
     if not raw_categories:
         # Fallback defaults with Other at the end
@@ -378,6 +657,61 @@ def _prepare_categories_for_select(raw_categories):
     return non_other
 
 
+def _build_inventory_filters(selected_categories, selected_statuses,
+                             min_price, max_price,
+                             discount_only, hot_only, trending_only):
+    """
+    Translate the inventory filter-menu selections into a SQL WHERE clause
+    and parameter list. Shared by the browse and search paths so both apply
+    identical filtering at the database level.
+    """
+    where_clauses = ["LOWER(status) <> %s"]
+    params = ["unlisted"]
+
+    # Category filter
+    if selected_categories:
+        placeholders = ", ".join(["%s"] * len(selected_categories))
+        where_clauses.append(f"category IN ({placeholders})")
+        params.extend(selected_categories)
+
+    # Status filter
+    if selected_statuses:
+        normalized_statuses = [s.lower() for s in selected_statuses]
+        placeholders = ", ".join(["%s"] * len(normalized_statuses))
+        where_clauses.append(f"LOWER(status) IN ({placeholders})")
+        params.extend(normalized_statuses)
+
+    # Price filters
+    if min_price is not None:
+        where_clauses.append("price >= %s")
+        params.append(min_price)
+    if max_price is not None:
+        where_clauses.append("price <= %s")
+        params.append(max_price)
+
+    # Discount-only: original_price > price
+    if discount_only:
+        where_clauses.append(
+            "original_price IS NOT NULL AND original_price > price"
+        )
+
+    # Hot-only: same definition as template HOT badge: popularity > 10.
+    # likes * 10 > views is the division-free form of
+    # ceil(likes * 100 / views) > 10, keeping the comparison in integer
+    # math and off the indexed views column's "wrong side".
+    if hot_only:
+        where_clauses.append(
+            "views > 0 AND likes * 10 > views"
+        )
+
+    # Trending-only: items with views > 0, ordered by views desc, limited to 10
+    if trending_only:
+        where_clauses.append("views > 0")
+
+    where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
+    return where_sql, params
+
+
 @app.route('/inventory', methods=['GET'])
 def get_inventory():
     query = request.args.get('q', '').strip()
@@ -413,125 +747,44 @@ def get_inventory():
 
     db = get_db()
 
-    # Determine which items are currently in this user's cart
+    # Determine which items are currently in this user's cart. Only the ids
+    # are needed here (for the "in cart" badges), so skip loading full rows.
     cart_item_ids = set()
     cart_id = session.get('cart_id')
     if cart_id:
-        cart_rows = db.get_cart_items(cart_id)
-        cart_item_ids = {str(row.item_id) for row in cart_rows}
+        cart_item_ids = db.get_cart_item_ids(cart_id)
+
+    where_sql, filter_params = _build_inventory_filters(
+        selected_categories,
+        selected_statuses,
+        min_price,
+        max_price,
+        discount_only,
+        hot_only,
+        trending_only,
+    )
 
     if query:
         # ----------------------------------------------
-        # Search path: keep existing Python-level logic
+        # Search path: SQL pre-filter, then rank by relevance
         # ----------------------------------------------
-        items = []
-        # Use enhanced keyword + semantic search over inventory
+        # Apply the same filters as the browse path in SQL, so the
+        # searcher only has to score rows that can actually be shown.
+        filter_sql = f"SELECT * FROM inventory WHERE {where_sql}"
+        candidate_rows = db._execute(filter_sql, filter_params).fetchall()
+
+        # Use enhanced keyword + semantic search over the filtered rows
         searcher = InventorySearch(db=db)
-        search_results = searcher.search(query, top_k=None)
+        search_results = searcher.search(query, top_k=None, items=candidate_rows)
         items = [r["item"] for r in search_results]
 
-        # Never show items that are marked as unlisted in the main inventory view.
-        def _item_is_listed(it):
-            status = (getattr(it, "status", "") or "").lower()
-            return status != "unlisted"
-
-        items = [it for it in items if _item_is_listed(it)]
-
-        # Apply category filter if any categories were selected
-        if selected_categories:
-            normalized_selected = set(selected_categories)
-
-            def item_in_selected_category(it):
-                cat = getattr(it, "category", None) or "Other"
-                return cat in normalized_selected
-
-            items = [it for it in items if item_in_selected_category(it)]
-
-        # Apply status filter if any statuses were selected
-        if selected_statuses:
-            normalized_statuses = {s.lower() for s in selected_statuses}
-
-            def item_in_selected_status(it):
-                status = (getattr(it, "status", "") or "").lower()
-                return status in normalized_statuses
-
-            items = [it for it in items if item_in_selected_status(it)]
-
-        # Apply price filters if provided
-        if min_price is not None:
-
-            def item_meets_min_price(it):
-                price = getattr(it, "price", None)
-                try:
-                    price = float(price)
-                except (TypeError, ValueError):
-                    return False
-                return price >= min_price
-
-            items = [it for it in items if item_meets_min_price(it)]
-
-        if max_price is not None:
-
-            def item_meets_max_price(it):
-                price = getattr(it, "price", None)
-                try:
-                    price = float(price)
-                except (TypeError, ValueError):
-                    return False
-                return price <= max_price
-
-            items = [it for it in items if item_meets_max_price(it)]
-
-        # Apply discount-only filter (items where original_price > price)
-        if discount_only:
-
-            def item_is_discounted(it):
-                price = getattr(it, "price", None)
-                original_price = getattr(it, "original_price", None)
-                try:
-                    price = float(price)
-                    original_price = float(original_price)
-                except (TypeError, ValueError):
-                    return False
-                return original_price > price
-
-            items = [it for it in items if item_is_discounted(it)]
-
-        # Apply hot-only filter (same popularity definition as template HOT badge)
-        if hot_only:
-
-            def item_is_hot(it):
-                views = getattr(it, "views", 0) or 0
-                likes = getattr(it, "likes", 0) or 0
-                try:
-                    views = float(views)
-                    likes = float(likes)
-                except (TypeError, ValueError):
-                    return False
-                if views <= 0:
-                    return False
-                popularity = math.ceil((likes * 100.0) / views)
-                return popularity > 10
-
-            items = [it for it in items if item_is_hot(it)]
-
-        # Apply trending-only filter: top items by view count (exclude items with 0 views)
+        # Trending-only additionally caps the result set at the ten
+        # most-viewed matches; ordering is otherwise by relevance.
+        # nlargest only keeps a 10-slot heap instead of sorting every match.
         if trending_only:
-
-            def item_has_views(it):
-                views = getattr(it, "views", 0) or 0
-                try:
-                    views = int(views)
-                except (TypeError, ValueError):
-                    return False
-                return views > 0
-
-            # Keep only items that have at least one view
-            items = [it for it in items if item_has_views(it)]
-            # Sort by views descending and keep at most 10
-            items.sort(key=lambda it: getattr(it, "views", 0) or 0, reverse=True)
-            if len(items) > 10:
-                items = items[:10]
+            items = heapq.nlargest(
+                10, items, key=lambda it: getattr(it, "views", 0) or 0
+            )
 
         total_items = len(items)
         if total_items == 0:
@@ -553,60 +806,56 @@ def get_inventory():
         # ----------------------------------------------
         # Non-search path: push filters and pagination into SQL
         # ----------------------------------------------
-        where_clauses = ["LOWER(status) <> %s"]
-        params = ["unlisted"]
-
-        # Category filter
-        if selected_categories:
-            placeholders = ", ".join(["%s"] * len(selected_categories))
-            where_clauses.append(f"category IN ({placeholders})")
-            params.extend(selected_categories)
-
-        # Status filter
-        if selected_statuses:
-            normalized_statuses = [s.lower() for s in selected_statuses]
-            placeholders = ", ".join(["%s"] * len(normalized_statuses))
-            where_clauses.append(f"LOWER(status) IN ({placeholders})")
-            params.extend(normalized_statuses)
-
-        # Price filters
-        if min_price is not None:
-            where_clauses.append("price >= %s")
-            params.append(min_price)
-        if max_price is not None:
-            where_clauses.append("price <= %s")
-            params.append(max_price)
-
-        # Discount-only: original_price > price
-        if discount_only:
-            where_clauses.append(
-                "original_price IS NOT NULL AND original_price > price"
-            )
-
-        # Hot-only: same definition as template HOT badge: popularity > 10
-        if hot_only:
-            where_clauses.append(
-                "views > 0 AND (likes * 100.0 / views) > 10"
-            )
+        params = filter_params
 
-        # Trending-only: items with views > 0, ordered by views desc, limited to 10
         if trending_only:
-            where_clauses.append("views > 0")
+            limit = min(per_page, 10)
+            order_by = "ORDER BY views DESC"
+        else:
+            limit = per_page
+            # Prefer newest items first when browsing inventory
+            order_by = "ORDER BY created_at DESC"
 
-        where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
+        if page < 1:
+            page = 1
 
-        # Count matching rows
-        count_sql = f"SELECT COUNT(*) AS cnt FROM inventory WHERE {where_sql}"
-        count_cur = db._execute(count_sql, params)
-        count_row = count_cur.fetchone()
-        full_count = int(getattr(count_row, "cnt", 0) or 0)
+        # Project only the columns the listing template renders.
+        # Descriptions are shown truncated to 300 chars, so transfer
+        # just enough of the text instead of the whole column. The
+        # COUNT(*) OVER () window rides along on every row so the total
+        # comes back with the page data instead of a separate count query.
+        data_sql = f"""
+            SELECT id, name, LEFT(description, 400) AS description,
+                   price, original_price, category, status, image_url,
+                   views, likes, created_at,
+                   COUNT(*) OVER () AS total_rows
+            FROM inventory
+            WHERE {where_sql}
+            {order_by}
+            LIMIT %s OFFSET %s;
+        """
+
+        def _fetch_page(page_number):
+            offset = (page_number - 1) * per_page
+            return db._execute(data_sql, params + [limit, offset]).fetchall()
+
+        page_items = _fetch_page(page)
+
+        if page_items:
+            full_count = int(getattr(page_items[0], "total_rows", 0) or 0)
+        elif page > 1:
+            # Requested a page past the end; only now is a separate count
+            # needed, to clamp the page number and refetch.
+            count_sql = f"SELECT COUNT(*) AS cnt FROM inventory WHERE {where_sql}"
+            count_row = db._execute(count_sql, params).fetchone()
+            full_count = int(getattr(count_row, "cnt", 0) or 0)
+        else:
+            full_count = 0
 
         if trending_only:
-            effective_total_items = min(full_count, 10)
+            total_items = min(full_count, 10)
         else:
-            effective_total_items = full_count
-
-        total_items = effective_total_items or 0
+            total_items = full_count
 
         if total_items == 0:
             total_pages = 1
@@ -614,33 +863,9 @@ def get_inventory():
             page_items = []
         else:
             total_pages = (total_items + per_page - 1) // per_page
-
-            # Clamp page to valid range
-            if page < 1:
-                page = 1
             if page > total_pages:
                 page = total_pages
-
-            if trending_only:
-                limit = min(per_page, 10)
-                offset = (page - 1) * per_page
-                order_by = "ORDER BY views DESC"
-            else:
-                limit = per_page
-                offset = (page - 1) * per_page
-                # Prefer newest items first when browsing inventory
-                order_by = "ORDER BY created_at DESC"
-
-            data_sql = f"""
-                SELECT *
-                FROM inventory
-                WHERE {where_sql}
-                {order_by}
-                LIMIT %s OFFSET %s;
-            """
-            data_params = params + [limit, offset]
-            data_cur = db._execute(data_sql, data_params)
-            page_items = data_cur.fetchall()
+                page_items = _fetch_page(page)
 
     # Build a mapping of item_id -> list of image URLs for use in
     # the inventory thumbnail carousel. Always include the primary
@@ -665,8 +890,8 @@ def get_inventory():
         inventory_images[item_id_str] = imgs
 
     # Build the dynamic category list for the inventory filter sidebar
-    raw_categories = db.get_all_categories()
-    categories_for_filter = _prepare_categories_for_select(raw_categories)
+    raw_categories = _get_all_categories_cached(db)
+    categories_for_filter = _prepare_categories_for_select(tuple(raw_categories or ()))
 
     return render_template(
         "inventory.html",
@@ -689,6 +914,27 @@ def get_inventory():
     )
 
 
+_TS_FMT = "%Y-%m-%d %H:%M:%S"
+
+
+def _format_ts(dt):
+    """
+    Format a timestamp without milliseconds, including timezone (naive
+    datetimes are assumed UTC). Defined once at module scope so renders
+    don't rebuild the function object per request.
+    """
+    if not dt:
+        return ""
+    # Ensure we drop microseconds
+    dt = dt.replace(microsecond=0)
+    if dt.tzinfo is None:
+        # Treat naive datetimes as UTC (the common case for our rows)
+        return dt.strftime(_TS_FMT) + " UTC"
+    if dt.tzinfo.utcoffset(dt) is None:
+        return dt.strftime(_TS_FMT) + " UTC"
+    return dt.strftime(_TS_FMT + " %Z")
+
+
 @app.route('/inventory/<item_id>', methods=['GET'])
 def product_detail(item_id):
     db = get_db()
@@ -697,55 +943,36 @@ def product_detail(item_id):
     cart_item_ids = set()
     if cart_id:
         try:
-            cart_rows = db.get_cart_items(cart_id)
-            cart_item_ids = {str(row.item_id) for row in cart_rows}
+            # Only the ids are needed for the "in cart" badges, so skip
+            # pulling full cart rows.
+            cart_item_ids = db.get_cart_item_ids(cart_id)
             in_cart = str(item_id) in cart_item_ids
         except Exception:
             # If cart lookup fails, just treat as not in cart
             cart_item_ids = set()
             in_cart = False
 
-    item = db.get_item_by_id('inventory', item_id)
-    if item is None:
-        abort(404)
-
-    # Bump the view count each time the detail page is requested
+    # Bump the view count; the incremented value comes back from the same
+    # statement, so no re-read of the row is needed to display it.
     try:
-        db.increment_item_view_count('inventory', item_id)
-        # Re-fetch the item so the updated view count is reflected in the UI
-        item = db.get_item_by_id('inventory', item_id)
+        new_views = db.increment_and_return_views(item_id)
     except Exception:
         # Do not block the page load if view-count tracking fails
-        pass
-    # Load any additional images for this item; fall back to primary image_url
-    images = db.get_images_for_item(item_id)
-    # Find up to 10 other items in the same category (if any), excluding this item
-    related_items = []
+        new_views = 0
+
+    # Item row and gallery images come back in one round trip.
+    item, images = db.get_item_with_images(item_id)
+    if item is None:
+        abort(404)
+    if new_views:
+        item.views = new_views
+    # Find up to 10 other items in the same category (if any), excluding
+    # this item — one LIMIT query instead of a scan over the full table.
     category = getattr(item, "category", None)
-    if category:
-        all_items = db.get_all_data('inventory')
-        for other in all_items:
-            if str(getattr(other, "id", "")) == str(item.id):
-                continue
-            if getattr(other, "category", None) == category:
-                related_items.append(other)
-            if len(related_items) >= 10:
-                break
+    related_items = db.get_related_items(category, item.id, limit=10)
     if not images:
         images = [item.image_url] if getattr(item, "image_url", None) else []
 
-    # Format timestamps without milliseconds, including timezone (or assume UTC)
-    def _format_ts(dt):
-        if not dt:
-            return ""
-        # Ensure we drop microseconds
-        dt = dt.replace(microsecond=0)
-        tzinfo = dt.tzinfo
-        if tzinfo is None or tzinfo.utcoffset(dt) is None:
-            # Treat naive datetimes as UTC
-            return dt.strftime("%Y-%m-%d %H:%M:%S") + " UTC"
-        return dt.strftime("%Y-%m-%d %H:%M:%S %Z")
-
     created_display = _format_ts(getattr(item, "created_at", None))
     updated_display = _format_ts(getattr(item, "updated_at", None))
 
@@ -769,12 +996,10 @@ def like_item(item_id):
     will remove their like. The aggregate like count is kept in the inventory
     table, and individual user likes are tracked in a separate table.
     """
-    user = session.get("user") or {}
-    roles = user.get("roles") or []
-    user_id = user.get("id")
+    user_id = g.user.get("id")
 
     # Only logged-in, non-guest users can like items
-    if not user_id or "guest" in roles:
+    if not user_id or g.is_guest:
         # For AJAX callers, surface an error; for normal form posts, just redirect back.
         if request.is_json or request.headers.get("X-Requested-With") == "XMLHttpRequest":
             return jsonify({"error": "login_required"}), 403
@@ -846,17 +1071,17 @@ def edit_product(item_id):
             for line in images_text.splitlines()
             if line.strip()
         ]
-        all_images = []
         primary_url = update_data["image_url"]
-        if primary_url:
-            all_images.append(primary_url)
-        for url in extra_images:
-            if url not in all_images:
-                all_images.append(url)
+        # dict.fromkeys dedups in one pass while keeping the primary first.
+        all_images = list(dict.fromkeys(
+            ([primary_url] if primary_url else []) + extra_images
+        ))
 
         db.update_item('inventory', item_id, update_data)
         if all_images:
             db.set_images_for_item(item_id, all_images)
+        _invalidate_home_sections()
+        _invalidate_categories()
         return redirect(url_for('product_detail', item_id=item_id))
     else:
         item = db.get_item_by_id('inventory', item_id)
@@ -864,12 +1089,12 @@ def edit_product(item_id):
             abort(404)
         # Pre-populate image URLs: any stored images or fall back to the primary
         images = db.get_images_for_item(item_id)
-        raw_categories = db.get_all_categories()
+        raw_categories = _get_all_categories_cached(db)
         if images:
             image_urls_text = "\n".join(images)
         else:
             image_urls_text = getattr(item, "image_url", "") or ""
-        categories_for_select = _prepare_categories_for_select(raw_categories)
+        categories_for_select = _prepare_categories_for_select(tuple(raw_categories or ()))
         return render_template(
             "edit_product.html",
             item=item,
@@ -884,9 +1109,7 @@ def delete_product(item_id):
     """
     Admin-only: permanently delete an inventory item and its related records.
     """
-    user = session.get("user") or {}
-    roles = user.get("roles") or []
-    if "admin" not in roles:
+    if not g.is_admin:
         abort(403)
 
     db = get_db()
@@ -894,6 +1117,8 @@ def delete_product(item_id):
     if item is None:
         abort(404)
     db.delete_inventory_item(item_id)
+    _invalidate_home_sections()
+    _invalidate_categories()
     return redirect(url_for('get_inventory'))
 
 
@@ -903,9 +1128,7 @@ def add_product():
     Admin-only: add a new inventory item.
     Reuses the edit_product template with an empty item.
     """
-    user = session.get("user") or {}
-    roles = user.get("roles") or []
-    if "admin" not in roles:
+    if not g.is_admin:
         abort(403)
 
     db = get_db()
@@ -941,24 +1164,24 @@ def add_product():
             for line in images_text.splitlines()
             if line.strip()
         ]
-        all_images = []
-        if image_url:
-            all_images.append(image_url)
-        for url in extra_images:
-            if url not in all_images:
-                all_images.append(url)
+        # Order-preserving dedup; the primary image stays first.
+        all_images = list(dict.fromkeys(
+            ([image_url] if image_url else []) + extra_images
+        ))
 
         # Insert new item
         item_id = db.insert_data("inventory", insert_data)
         if all_images:
             db.set_images_for_item(item_id, all_images)
+        _invalidate_home_sections()
+        _invalidate_categories()
         return redirect(url_for("product_detail", item_id=item_id))
 
     # GET: render an empty item for the form
     # Include all attributes referenced in the template so Jinja
     # does not raise UndefinedError when accessing them.
-    raw_categories = db.get_all_categories()
-    categories_for_select = _prepare_categories_for_select(raw_categories)
+    raw_categories = _get_all_categories_cached(db)
+    categories_for_select = _prepare_categories_for_select(tuple(raw_categories or ()))
     empty_item = SimpleNamespace(
         id="",
         name="",
@@ -993,20 +1216,16 @@ def contact():
         if not name or not email_addr or not message:
             error = "Please fill in your name, email, and a message."
         else:
-            try:
-                send_contact_email(name, email_addr, message)
-                # On successful send, redirect to a confirmation page
-                return redirect(url_for('contact_sent'))
-            except Exception:
-                # If sending fails, show a friendly error
-                error = "We were unable to send your message. Please try again later."
+            # Hand the SMTP work to the background pool so the redirect
+            # doesn't wait on the mail server.
+            send_contact_email_async(name, email_addr, message)
+            return redirect(url_for('contact_sent'))
 
     # If the user is logged in, pre-fill their name and email in the form by default.
     # The template will prefer any values the user just submitted (request.form),
     # but fall back to these when the form is first loaded.
-    session_user = session.get("user") or {}
-    contact_name = session_user.get("name", "") or ""
-    contact_email = session_user.get("email", "") or ""
+    contact_name = g.user.get("name", "") or ""
+    contact_email = g.user.get("email", "") or ""
 
     return render_template(
         "contact.html",
@@ -1086,12 +1305,13 @@ def forgot_password_send_link():
         user = db.get_user_by_email(email)
         if user:
             # Create a one-time token that is valid for 5 minutes.
-            token = uuid.uuid4().hex
-            expires_at = (datetime.utcnow() + timedelta(minutes=5)).isoformat()
+            token = secrets.token_hex(16)
+            # Expiry as epoch seconds: validation is then one int compare.
+            expires_at = int(time.time()) + _RESET_TOKEN_TTL_SECONDS
             db.create_password_reset_token(str(user.id), token, expires_at)
 
             reset_url = url_for("reset_password", token=token, _external=True)
-            send_password_reset_email(email, reset_url)
+            send_password_reset_email_async(email, reset_url)
         session['login_error'] = (
             "If an account with that email exists, we've emailed a reset link. "
             "Please check your email for the link to reset your password."
@@ -1114,13 +1334,14 @@ def reset_password(token):
     if not row:
         error = "This password reset link is invalid or has expired."
     else:
-        # Validate expiration
+        # Validate expiration: expires_at is epoch seconds, so this is a
+        # single integer compare with no datetime parsing or allocation.
         try:
-            expires_at = datetime.fromisoformat(row.expires_at)
-        except Exception:
-            expires_at = None
+            expired = int(row.expires_at) < int(time.time())
+        except (TypeError, ValueError):
+            expired = True
 
-        if not expires_at or datetime.utcnow() > expires_at:
+        if expired:
             db.delete_password_reset_token(token)
             error = "This password reset link has expired. Please request a new one."
         elif request.method == "POST":
@@ -1157,9 +1378,7 @@ def admin_users():
     Admin-only user management page.
     Allows searching existing users and updating basic user info (not passwords).
     """
-    user = session.get("user") or {}
-    roles = user.get("roles") or []
-    if "admin" not in roles:
+    if not g.is_admin:
         abort(403)
 
     db = get_db()
@@ -1239,9 +1458,7 @@ def admin_categories():
       - delete a category (reassigning items to \"Other\")
       - add a new category label
     """
-    user = session.get("user") or {}
-    roles = user.get("roles") or []
-    if "admin" not in roles:
+    if not g.is_admin:
         abort(403)
 
     action = (request.form.get("action") or "").strip()
@@ -1268,6 +1485,8 @@ def admin_categories():
         if name:
             db.add_category_if_missing(name)
             session["admin_updated_category_name"] = name
+    # Any of the actions above can change the category list.
+    _invalidate_categories()
     # Always return to the main admin page after a category change.
     return redirect(url_for("admin_users"))
 
@@ -1277,13 +1496,11 @@ def profile():
     """
     Profile page for logged-in (non-guest) users to update their own basic info.
     """
-    session_user = session.get("user") or {}
-    roles = session_user.get("roles") or []
     # Guests and anonymous users should not access profile
-    if not session_user or "guest" in roles:
+    if not g.user or g.is_guest:
         abort(403)
 
-    user_id = session_user.get("id")
+    user_id = g.user.get("id")
     if not user_id:
         abort(403)
 
@@ -1300,18 +1517,27 @@ def profile():
     total_sales = 0
     total_pages = 1
 
-    user = db.get_user_by_id(str(user_id))
+    user = _load_user_cached(db, user_id)
     if not user:
         abort(404)
 
-    # Load paginated sales for this user
-    total_sales = db.count_sales_for_user(str(user_id))
+    # Load paginated sales for this user. The windowed query returns the
+    # page and the total in one round-trip; a separate count is only
+    # needed if the requested page lies past the end.
+    offset = (page - 1) * page_size
+    recent_sales, total_sales = db.get_sales_page_for_user(
+        str(user_id), limit=page_size, offset=offset
+    )
+    if not recent_sales and page > 1:
+        total_sales = db.count_sales_for_user(str(user_id))
     if total_sales > 0:
         total_pages = (total_sales + page_size - 1) // page_size
         if page > total_pages:
             page = total_pages
-        offset = (page - 1) * page_size
-        recent_sales = db.get_sales_for_user(str(user_id), limit=page_size, offset=offset)
+            offset = (page - 1) * page_size
+            recent_sales, _ = db.get_sales_page_for_user(
+                str(user_id), limit=page_size, offset=offset
+            )
 
     if request.method == "POST":
         first_name = (request.form.get("first_name") or "").strip()
@@ -1329,7 +1555,8 @@ def profile():
             db.update_user(str(user.id), update_data)
             success = "Your profile has been updated."
             # Refresh user from DB and keep session in sync
-            user = db.get_user_by_id(str(user.id))
+            _invalidate_user_cached(user.id)
+            user = _load_user_cached(db, user.id)
             session["user"]["name"] = getattr(user, "firstname", "") or ""
     # Include any one-time success message from password link flow
     flash_success = session.pop("profile_success", None)
@@ -1353,26 +1580,25 @@ def profile_send_password_link():
     """
     Send the logged-in user an email with a link to change their password.
     """
-    session_user = session.get("user") or {}
-    roles = session_user.get("roles") or []
-    if not session_user or "guest" in roles:
+    if not g.user or g.is_guest:
         abort(403)
 
-    user_id = session_user.get("id")
+    user_id = g.user.get("id")
     if not user_id:
         abort(403)
 
     db = get_db()
-    user = db.get_user_by_id(str(user_id))
+    user = _load_user_cached(db, user_id)
     if user:
         email = (getattr(user, "email", "") or "").strip().lower()
         if email:
-            token = uuid.uuid4().hex
-            expires_at = (datetime.utcnow() + timedelta(minutes=5)).isoformat()
+            token = secrets.token_hex(16)
+            # Expiry as epoch seconds: validation is then one int compare.
+            expires_at = int(time.time()) + _RESET_TOKEN_TTL_SECONDS
             db.create_password_reset_token(str(user.id), token, expires_at)
 
             reset_url = url_for("reset_password", token=token, _external=True)
-            send_password_reset_email(email, reset_url)
+            send_password_reset_email_async(email, reset_url)
     session["profile_success"] = (
         "If an account with your email exists, we've emailed a link to change your password."
     )
@@ -1385,13 +1611,11 @@ def order_detail(order_id):
     Detail view for a single sale/order. Only the owning user (or admins)
     may view a sale.
     """
-    session_user = session.get("user") or {}
-    roles = session_user.get("roles") or []
-    if not session_user or "guest" in roles:
+    if not g.user or g.is_guest:
         abort(403)
 
-    current_user_id = session_user.get("id")
-    if not current_user_id and "admin" not in roles:
+    current_user_id = g.user.get("id")
+    if not current_user_id and not g.is_admin:
         abort(403)
 
     db = get_db()
@@ -1402,11 +1626,11 @@ def order_detail(order_id):
     # Enforce that only the owner (or admin) can see this sale
     sale_user_id = getattr(sale, "user_id", None)
     if sale_user_id:
-        if str(sale_user_id) != str(current_user_id) and "admin" not in roles:
+        if str(sale_user_id) != str(current_user_id) and not g.is_admin:
             abort(403)
     else:
         # If the sale has no associated user, restrict to admins
-        if "admin" not in roles:
+        if not g.is_admin:
             abort(403)
 
     items = db.get_items_for_sale(str(order_id))
@@ -1429,9 +1653,7 @@ def signup():
 
         if action == "guest":
             # Simple guest "sign-in": mark session and redirect
-            session['user'] = {
-                "roles": ["guest"],
-            }
+            session['user'] = _build_session_user(["guest"])
             # After choosing to continue as guest from the signup page,
             # send the user to the home page where they can browse.
             return redirect(url_for('home'))
@@ -1452,7 +1674,6 @@ def signup():
             error = "Password must be at least 8 characters and include uppercase, lowercase, numbers, and special characters."
         else:
             db = get_db()
-            db.create_users_table()
             existing = db.get_user_by_email(email)
             if existing:
                 error = "An account with that email already exists."
@@ -1484,9 +1705,7 @@ def login():
     # Treat GET as a request to show the modal, not a standalone page
     if request.method == 'GET':
         # If the current user is a guest, clear that so the modal will appear
-        user = session.get("user") or {}
-        roles = user.get("roles") or []
-        if "guest" in roles:
+        if g.is_guest:
             session.pop("user", None)
         next_url = request.args.get("next") or url_for('home')
         return redirect(next_url)
@@ -1498,7 +1717,7 @@ def login():
 
     # Allow users to continue as a guest
     if action == "guest":
-        session['user'] = {"roles": ["guest"]}
+        session['user'] = _build_session_user(["guest"])
         return redirect(next_url)
 
     # Normal login flow
@@ -1507,29 +1726,44 @@ def login():
 
     if not email or not password:
         error = "Please enter both username (email) and password."
+    elif len(password) < 8:
+        # Signup enforces a minimum password length, so nothing stored can
+        # match; answer probe traffic without a DB lookup (but still count
+        # it toward the rate limit). The email format is deliberately not
+        # checked here — signup never validated it, so legacy accounts may
+        # have stored addresses this would lock out.
+        _record_failed_login(email, request.remote_addr or "")
+        error = "Invalid username or password."
+    elif _login_attempts_exceeded(email, request.remote_addr or ""):
+        # Too many recent failures for this account from this address;
+        # refuse before doing any hashing or DB work.
+        error = "Too many login attempts. Please wait a minute and try again."
     else:
         db = get_db()
-        db.create_users_table()
         user = db.get_user_by_email(email)
 
         if not user:
+            _record_failed_login(email, request.remote_addr or "")
             error = "Invalid username or password."
         else:
             # Recompute the hash using the stored phone and the entered password
             stored_phone = getattr(user, "phone", "") or ""
             stored_hash = getattr(user, "password", "") or ""
             candidate_hash = hash_user_password(email, stored_phone, password)
-            if candidate_hash != stored_hash:
+            # Constant-time compare: == short-circuits on the first
+            # differing byte, which leaks timing information.
+            if not hmac.compare_digest(candidate_hash, stored_hash):
+                _record_failed_login(email, request.remote_addr or "")
                 error = "Invalid username or password."
             else:
                 # Successful login
                 roles = parse_roles(getattr(user, "usertype", None)) or ["customer"]
-                session['user'] = {
-                    "id": str(getattr(user, "id", "")),
-                    "name": getattr(user, "firstname", "") or "",
-                    "email": email,
-                    "roles": roles,
-                }
+                session['user'] = _build_session_user(
+                    roles,
+                    id=str(getattr(user, "id", "")),
+                    name=getattr(user, "firstname", "") or "",
+                    email=email,
+                )
                 # If there was a guest cart, normalize its items to remove TTL
                 cart_id = session.get("cart_id")
                 if cart_id:
@@ -1552,13 +1786,10 @@ def login_overlay():
     login dialog to appear instead of navigating to the standalone login
     route. For all other users, fall back to the normal login behavior.
     """
-    user = session.get("user") or {}
-    roles = user.get("roles") or []
-
     next_url = request.args.get("next") or request.referrer or url_for("home")
 
     # Only special-case guests; everyone else uses the normal login flow.
-    if "guest" in roles:
+    if g.is_guest:
         session["force_login_overlay"] = True
         return redirect(next_url)
 
@@ -1570,79 +1801,72 @@ def logout():
     """
     Log the current user out and return to the home page.
     """
-    # If there is an active cart, clear it and discard the cart_id
+    # If there is an active cart, clear it and discard the cart_id. The
+    # clear + release runs as one DB-side operation instead of a per-item
+    # is-in-any-cart probe loop.
     cart_id = session.get('cart_id')
     if cart_id:
         db = get_db()
-        # Capture the items currently in this cart so we can potentially
-        # release them back to "available" status after clearing.
-        cart_rows = db.get_cart_items(cart_id)
-        item_ids = {str(row.item_id) for row in cart_rows}
-
-        # Clear all items from this cart
-        db.clear_cart(cart_id)
-
-        # For each item that is no longer present in any cart at all,
-        # mark it available again (mirrors the explicit remove behavior).
-        items_to_mark_available = []
-        for item_id in item_ids:
-            if not db.item_is_in_any_cart(item_id):
-                items_to_mark_available.append(item_id)
-        if items_to_mark_available:
-            db.mark_items_available('inventory', items_to_mark_available)
+        db.clear_cart_and_release_items(cart_id)
         session.pop('cart_id', None)
 
+    session.pop('cart_count', None)
     session.pop('user', None)
     return redirect(url_for('home'))
 
 
-@app.route('/cart', methods=['GET'])
-def view_cart():
+def _load_cart(db, cart_id):
+    """
+    Load a cart's inventory rows with one JOIN query instead of separate
+    cart-row and item fetches. Returns (items, quantities, total) with
+    items and quantities aligned; rows whose item has been deleted drop
+    out of the join.
+    """
+    rows = db.get_cart_items_with_inventory(cart_id)
     items = []
+    quantities = []
     total = 0.0
+    for row in rows:
+        qty = row.quantity or 1
+        items.append(row)
+        quantities.append(qty)
+        # price is a DECIMAL column, so the driver already hands back
+        # a numeric value; only NULL needs a fallback.
+        total += float(row.price or 0) * qty
+    return items, quantities, total
+
+
+@app.route('/cart', methods=['GET'])
+def view_cart():
+    # No cart yet: render the empty state without touching the DB.
     cart_id = session.get('cart_id')
-    if cart_id:
-        db = get_db()
-        cart_rows = db.get_cart_items(cart_id)
-        for row in cart_rows:
-            item = db.get_item_by_id('inventory', str(row.item_id))
-            if item is not None:
-                items.append(item)
-                try:
-                    qty = row.quantity or 1
-                    total += float(item.price) * qty
-                except Exception:
-                    pass
+    if not cart_id:
+        return render_template("cart.html", items=[], total=0.0)
 
+    db = get_db()
+    items, _, total = _load_cart(db, cart_id)
     return render_template("cart.html", items=items, total=total)
 
 
 @app.route('/cart/add/<item_id>', methods=['POST'])
 def add_to_cart(item_id):
     # Guests are not allowed to add items to the cart; instead, show the login dialog.
-    user = session.get("user") or {}
-    roles = user.get("roles") or []
-    if "guest" in roles:
+    if g.is_guest:
         session["force_login_overlay"] = True
         ref = request.referrer
         if ref:
             return redirect(ref)
         return redirect(url_for("home"))
 
-    # Only allow adding items that are still available
     db = get_db()
-    item = db.get_item_by_id('inventory', item_id)
-    if item is None or getattr(item, "status", "").lower() != "available":
-        # Silently redirect back if the item is no longer available
-        return redirect(url_for('product_detail', item_id=item_id))
-
     cart_id = get_or_create_cart_id()
-    # For furniture, just store quantity = 1; prevent duplicates
-    if not db.is_item_in_cart(cart_id, item_id):
-        ttl = None
-        db.add_item_to_cart(cart_id, item_id, quantity=1, ttl_seconds=ttl)
-        # As soon as an item enters any cart, mark it as pending in inventory
-        db.mark_items_pending('inventory', [item_id])
+    # One conditional write replaces the old read-check-insert sequence:
+    # reserve_item flips status to pending only while the item is still
+    # available, so the availability test and the pending-mark are a single
+    # atomic statement. A False result (already carted, sold, or unknown
+    # id) silently redirects back, matching the previous behavior.
+    if db.reserve_item(cart_id, item_id):
+        session.pop('cart_count', None)
     return redirect(url_for('product_detail', item_id=item_id))
 
 
@@ -1652,19 +1876,26 @@ def remove_from_cart(item_id):
     if cart_id:
         db = get_db()
         db.remove_item_from_cart(cart_id, item_id)
+        session.pop('cart_count', None)
         # If no other cart still contains this item, mark it available again
-        if not db.item_is_in_any_cart(item_id):
+        if not db.items_in_any_cart([item_id]):
             db.mark_items_available('inventory', [item_id])
     return redirect(url_for('view_cart'))
 
 
+_CONFIRMATION_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+
+
 def _generate_payment_confirmation(length: int = 16) -> str:
     """
     Generate a random alphanumeric confirmation code of the given length.
+
+    One secrets.choice per character instead of the old two-uuid4s-per-
+    character construction, and drawn from the CSPRNG throughout.
     """
-    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
-    return "".join(uuid.uuid4().hex[i % len(uuid.uuid4().hex)].upper() if i < 32 else alphabet[i % len(alphabet)]
-                   for i in range(length))
+    return "".join(
+        secrets.choice(_CONFIRMATION_ALPHABET) for _ in range(length)
+    )
 
 
 @app.route('/cart/generate-test-sale', methods=['POST'])
@@ -1674,9 +1905,7 @@ def generate_test_sale():
     and records entries in Sales, items_sold, and payments tables, then
     shows the payment confirmation page.
     """
-    session_user = session.get("user") or {}
-    roles = session_user.get("roles") or []
-    if "tester" not in roles:
+    if "tester" not in g.roles:
         abort(403)
 
     cart_id = session.get('cart_id')
@@ -1684,12 +1913,8 @@ def generate_test_sale():
         return redirect(url_for('view_cart'))
 
     db = get_db()
-    cart_rows = db.get_cart_items(cart_id)
-    items = []
-    for row in cart_rows:
-        item = db.get_item_by_id('inventory', str(row.item_id))
-        if item is not None:
-            items.append(item)
+    # Single JOIN: cart rows arrive with their inventory data attached.
+    items = db.get_cart_items_with_inventory(cart_id)
 
     if not items:
         return redirect(url_for('view_cart'))
@@ -1697,7 +1922,7 @@ def generate_test_sale():
     # For test sales, assume zero shipping fee by default
     shipping_fee = 0.0
     confirmation = _generate_payment_confirmation(16)
-    user_id = session_user.get("id")
+    user_id = g.user.get("id")
 
     sale = db.create_sale(
         user_id=user_id,
@@ -1715,13 +1940,17 @@ def generate_test_sale():
             "total": float(sale.total),
         }
 
-    # Clear cart after recording the test sale and free inventory if needed
-    item_ids = [str(getattr(it, "id", "")) for it in items if getattr(it, "id", None)]
+    # Clear cart after recording the test sale and free inventory if needed.
+    # One bulk membership query + one bulk status update instead of two
+    # statements per item.
+    item_ids = [str(it.id) for it in items]
     db.clear_cart(cart_id)
-    for item_id in item_ids:
-        if not db.item_is_in_any_cart(item_id):
-            db.mark_items_sold('inventory', [item_id])
+    still_carted = db.items_in_any_cart(item_ids)
+    sold_ids = [i for i in item_ids if i not in still_carted]
+    if sold_ids:
+        db.mark_items_sold('inventory', sold_ids)
     session.pop('cart_id', None)
+    session.pop('cart_count', None)
 
     return redirect(url_for('checkout_complete'))
 
@@ -1729,26 +1958,22 @@ def generate_test_sale():
 @app.route('/checkout', methods=['GET'])
 def checkout():
     """Show summary, payment options, and terms."""
-    items = []
-    total = 0.0
+    # Determine if the current user is a tester for showing test-sale UI
+    is_tester = "tester" in g.roles
+
+    # Anonymous/empty visits render the empty summary with zero DB work.
     cart_id = session.get('cart_id')
-    if cart_id:
-        db = get_db()
-        cart_rows = db.get_cart_items(cart_id)
-        for row in cart_rows:
-            item = db.get_item_by_id('inventory', str(row.item_id))
-            if item is not None:
-                items.append(item)
-                try:
-                    qty = row.quantity or 1
-                    total += float(item.price) * qty
-                except Exception:
-                    pass
+    if not cart_id:
+        return render_template(
+            "checkout.html",
+            items=[],
+            total=0.0,
+            paypal_client_id=PAYPAL_CLIENT_ID,
+            is_tester=is_tester,
+        )
 
-    # Determine if the current user is a tester for showing test-sale UI
-    session_user = session.get("user") or {}
-    roles = session_user.get("roles") or []
-    is_tester = "tester" in roles
+    db = get_db()
+    items, _, total = _load_cart(db, cart_id)
 
     return render_template(
         "checkout.html",
@@ -1762,22 +1987,87 @@ def checkout():
 @app.route('/checkout/complete', methods=['GET'])
 def checkout_complete():
     """Simple page shown after successful PayPal checkout."""
-    last_sale = session.pop("last_sale", None)
-    return render_template("checkout_complete.html", last_sale=last_sale)
+    last_sale = session.pop("last_sale") if "last_sale" in session else None
+    response = make_response(
+        render_template("checkout_complete.html", last_sale=last_sale)
+    )
+    if last_sale is None:
+        # Without sale details the page is generic, so let the browser
+        # revalidate with an ETag instead of re-downloading it. Kept
+        # private (not public) because responses still carry the session
+        # cookie and per-user header state.
+        response.cache_control.private = True
+        response.cache_control.max_age = 3600
+        response.add_etag()
+        return response.make_conditional(request)
+    # A render that shows confirmation details must never be reused.
+    response.cache_control.no_store = True
+    return response
+
+
+# One shared HTTP session for all PayPal calls. requests.post at module
+# level opens (and TLS-handshakes) a new connection per call; a Session
+# keeps pooled keep-alive connections to the PayPal host so sequential
+# token/order/capture calls reuse the same socket.
+_PAYPAL_SESSION = requests.Session()
+_PAYPAL_SESSION.mount(
+    "https://",
+    requests.adapters.HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        # Transient PayPal gateway errors get two quick retries instead
+        # of surfacing straight to the shopper. The default allowed
+        # methods exclude POST, so order create/capture is never replayed
+        # after an ambiguous failure.
+        max_retries=Retry(
+            total=2,
+            backoff_factor=0.3,
+            status_forcelist=(502, 503, 504),
+        ),
+    ),
+)
+
+# (connect, read) timeouts for every PayPal call, so a stalled gateway
+# can't pin a worker thread indefinitely.
+_PAYPAL_TIMEOUT = (3.05, 10)
+
+
+# PayPal client-credential tokens are valid for hours; cache the current
+# one and only hit the OAuth endpoint again shortly before it expires.
+_paypal_token_lock = threading.Lock()
+_paypal_token = {"value": None, "expires_at": 0.0}
+
+# Small pool used to run the token fetch concurrently with the cart load
+# during order creation.
+_paypal_io_executor = ThreadPoolExecutor(max_workers=4)
 
 
 def _get_paypal_access_token():
-    """Obtain an OAuth access token from PayPal."""
+    """Obtain an OAuth access token from PayPal, reusing a cached one."""
     if not PAYPAL_CLIENT_ID or not PAYPAL_CLIENT_SECRET:
         abort(500, description="PayPal is not configured on the server.")
 
+    now = time.monotonic()
+    with _paypal_token_lock:
+        if _paypal_token["value"] and now < _paypal_token["expires_at"]:
+            return _paypal_token["value"]
+
     auth = (PAYPAL_CLIENT_ID, PAYPAL_CLIENT_SECRET)
     headers = {"Accept": "application/json", "Accept-Language": "en_US"}
     data = {"grant_type": "client_credentials"}
-    resp = requests.post(f"{PAYPAL_API_BASE}/v1/oauth2/token", headers=headers, data=data, auth=auth)
+    resp = _PAYPAL_SESSION.post(f"{PAYPAL_API_BASE}/v1/oauth2/token", headers=headers, data=data, auth=auth, timeout=_PAYPAL_TIMEOUT)
     if resp.status_code != 200:
         abort(502, description="Failed to obtain PayPal access token.")
-    return resp.json().get("access_token")
+    payload = orjson.loads(resp.content)
+    token = payload.get("access_token")
+    expires_in = int(payload.get("expires_in") or 0)
+    if token and expires_in > 60:
+        # Refresh a minute early so in-flight requests never carry a token
+        # that expires mid-call.
+        with _paypal_token_lock:
+            _paypal_token["value"] = token
+            _paypal_token["expires_at"] = now + expires_in - 60
+    return token
 
 
 @app.route('/api/paypal/create-order', methods=['POST'])
@@ -1788,36 +2078,37 @@ def paypal_create_order():
     total = 0.0
     cart_id = session.get('cart_id')
 
-    if cart_id:
-        db = get_db()
-        cart_rows = db.get_cart_items(cart_id)
-        for row in cart_rows:
-            item = db.get_item_by_id('inventory', str(row.item_id))
-            if item is not None:
-                cart_items.append(item)
-                try:
-                    qty = row.quantity or 1
-                    price = float(getattr(item, "price", 0) or 0)
-                    total += price * qty
-                    paypal_items.append(
-                        {
-                            "name": getattr(item, "name", "") or f"Item {item.id}",
-                            "sku": str(getattr(item, "id", "") or ""),
-                            "unit_amount": {
-                                "currency_code": "USD",
-                                "value": f"{price:.2f}",
-                            },
-                            "quantity": str(qty),
-                        }
-                    )
-                except Exception:
-                    # If anything goes wrong computing a line item, skip that item
-                    continue
+    if not cart_id:
+        # Nothing to order: answer before any DB or PayPal work happens.
+        return jsonify({"error": "Cart is empty or total is invalid."}), 400
+
+    db = get_db()
+    # Fetch the PayPal token on a worker thread while the cart loads
+    # from MySQL: the two network waits overlap instead of adding up.
+    token_future = _paypal_io_executor.submit(_get_paypal_access_token)
+    cart_items, quantities, total = _load_cart(db, cart_id)
+    # Items come straight from the inventory join, so the columns are
+    # known: plain attribute access, no getattr towers or blanket except
+    # that would silently drop a line item.
+    for item, qty in zip(cart_items, quantities):
+        price = float(item.price or 0)
+        paypal_items.append(
+            {
+                "name": item.name or f"Item {item.id}",
+                "sku": str(item.id),
+                "unit_amount": {
+                    "currency_code": "USD",
+                    "value": f"{price:.2f}",
+                },
+                "quantity": str(qty),
+            }
+        )
 
     if not cart_items or total <= 0:
         return jsonify({"error": "Cart is empty or total is invalid."}), 400
 
-    access_token = _get_paypal_access_token()
+    # Re-raises any HTTPException from the token fetch in request context.
+    access_token = token_future.result()
     headers = {
         "Content-Type": "application/json",
         "Authorization": f"Bearer {access_token}",
@@ -1836,10 +2127,10 @@ def paypal_create_order():
             }
         ]
     }
-    resp = requests.post(f"{PAYPAL_API_BASE}/v2/checkout/orders", json=body, headers=headers)
+    resp = _PAYPAL_SESSION.post(f"{PAYPAL_API_BASE}/v2/checkout/orders", data=orjson.dumps(body), headers=headers, timeout=_PAYPAL_TIMEOUT)
     if resp.status_code not in (200, 201):
         return jsonify({"error": "Failed to create PayPal order."}), 502
-    data = resp.json()
+    data = orjson.loads(resp.content)
     return jsonify({"id": data.get("id")})
 
 
@@ -1856,11 +2147,11 @@ def paypal_capture_order():
         "Content-Type": "application/json",
         "Authorization": f"Bearer {access_token}",
     }
-    resp = requests.post(f"{PAYPAL_API_BASE}/v2/checkout/orders/{order_id}/capture", headers=headers)
+    resp = _PAYPAL_SESSION.post(f"{PAYPAL_API_BASE}/v2/checkout/orders/{order_id}/capture", headers=headers, timeout=_PAYPAL_TIMEOUT)
     if resp.status_code not in (200, 201):
         return jsonify({"error": "Failed to capture PayPal order."}), 502
 
-    capture_data = resp.json()
+    capture_data = orjson.loads(resp.content)
     status = capture_data.get("status")
 
     # Only mark items pending if PayPal says the order is completed
@@ -1868,18 +2159,13 @@ def paypal_capture_order():
         cart_id = session.get('cart_id')
         if cart_id:
             db = get_db()
-            cart_rows = db.get_cart_items(cart_id)
-            items = []
-            item_ids = []
-            for row in cart_rows:
-                item = db.get_item_by_id('inventory', str(row.item_id))
-                if item is not None:
-                    items.append(item)
-                    item_ids.append(str(row.item_id))
+            # Single JOIN: cart rows arrive with their inventory data
+            # attached, so no second fetch is needed at all.
+            items = db.get_cart_items_with_inventory(cart_id)
+            item_ids = [str(row.id) for row in items]
 
             # Record the sale in the database
-            user = session.get("user") or {}
-            user_id = user.get("id")
+            user_id = g.user.get("id")
             shipping_fee = 0.0
             sale = None
             if items:
@@ -1899,10 +2185,9 @@ def paypal_capture_order():
                     "total": float(sale.total),
                 }
 
-            if item_ids:
-                db.mark_items_sold('inventory', item_ids)
-            db.clear_cart(cart_id)
+            db.finalize_order(cart_id, item_ids)
             session.pop('cart_id', None)
+            session.pop('cart_count', None)
 
     return jsonify(
         {
@@ -6,6 +6,10 @@ import mysql.connector
 
 SQLITE_PATH = os.environ.get("SQLITE_PATH", "chloe.db")
 
+# Rows per executemany batch; bounds both the parameter count per
+# statement and peak memory while staying far cheaper than row-at-a-time.
+BATCH_SIZE = 1000
+
 
 def get_sqlite_connection():
     conn = sqlite3.connect(SQLITE_PATH)
@@ -31,7 +35,12 @@ def get_mysql_connection():
     if ssl_ca:
         kwargs["ssl_ca"] = ssl_ca
 
-    return mysql.connector.connect(**kwargs)
+    conn = mysql.connector.connect(**kwargs)
+    # Keep the whole per-table copy in one transaction: batches pile up
+    # server-side and a single commit per table does the durable write,
+    # instead of paying a flush per batch.
+    conn.autocommit = False
+    return conn
 
 
 def copy_table(sqlite_conn, mysql_conn, table_name, mysql_table_name=None):
@@ -53,22 +62,28 @@ def copy_table(sqlite_conn, mysql_conn, table_name, mysql_table_name=None):
     col_list = ", ".join(columns)
     placeholders = ", ".join(["%s"] * len(columns))
 
-    # Fetch all rows from SQLite
+    # Stream rows from SQLite instead of materializing the whole table,
+    # so peak memory stays at one batch regardless of table size.
     s_cur.execute(f"SELECT {col_list} FROM {table_name};")
-    rows = s_cur.fetchall()
 
     m_cur = mysql_conn.cursor()
     # Clear existing rows to avoid duplicates
     m_cur.execute(f"DELETE FROM {mysql_table_name};")
 
+    # Insert in batches: executemany lets the connector send multi-row
+    # INSERTs, so an N-row table costs N/BATCH_SIZE round-trips instead
+    # of one per row.
+    insert_sql = (
+        f"INSERT INTO {mysql_table_name} ({col_list}) VALUES ({placeholders})"
+    )
     count = 0
-    for row in rows:
-        values = [row[c] for c in columns]
-        m_cur.execute(
-            f"INSERT INTO {mysql_table_name} ({col_list}) VALUES ({placeholders})",
-            values,
-        )
-        count += 1
+    while True:
+        rows = s_cur.fetchmany(BATCH_SIZE)
+        if not rows:
+            break
+        batch = [tuple(row[c] for c in columns) for row in rows]
+        m_cur.executemany(insert_sql, batch)
+        count += len(batch)
 
     mysql_conn.commit()
     print(f"Copied {count} rows into {mysql_table_name}")